@@ -4,7 +4,9 @@ from __future__ import absolute_import, print_function
 import argparse
 import logging
 
+from .govinfo import stats
 from .govinfo.downloader import Downloader as dl
+from .pg_run.pg_copy import crCopyToPG
 from .pg_run.pg_cr_bulkwrite import crToPG as cr
 
 
@@ -32,8 +34,12 @@ def main():
     parser.add_argument(
         "do_mode",
         type=str,
-        choices=["json", "pg", "noparse"],
+        choices=["json", "ndjson", "parquet", "es", "sqlite", "pg", "noparse"],
         help="json: Store json\n \
+        ndjson: Store one JSON Lines file per day or month.\n \
+        parquet: Store Parquet tables of documents, items and bills.\n \
+        es: Index into Elasticsearch (see --es-url and --index).\n \
+        sqlite: Load into a SQLite database with full-text search.\n \
         pg: Generate flatfiles for Postgres.\n \
         noparse: Just download the files.",
     )
@@ -46,18 +52,174 @@ def main():
         "--logfile", type=str, help="Use a particular logfile.", default="cr2.log"
     )
 
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        help="Number of worker processes to parse granules with.",
+        default=1,
+    )
+
+    parser.add_argument(
+        "--days-in-flight",
+        type=int,
+        help="Number of days to download at once.",
+        default=1,
+    )
+
+    parser.add_argument(
+        "--per-host",
+        type=int,
+        help="Most connections to open to one host while downloading.",
+    )
+
+    parser.add_argument(
+        "--keep-zip",
+        action="store_true",
+        help="Keep each day's zip package and parse from it instead of extracting.",
+    )
+
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="In json mode, skip granules unchanged since the last run.",
+    )
+
+    parser.add_argument(
+        "--spans",
+        action="store_true",
+        help="Give content items offsets into their granule's text.",
+    )
+
+    parser.add_argument(
+        "--regex-engine",
+        type=str,
+        choices=["re", "re2"],
+        help="Classify lines with google-re2 where the patterns allow it.",
+        default="re",
+    )
+
+    parser.add_argument(
+        "--parse-cache",
+        type=str,
+        help="Cache parsed granules in this directory and reuse them.",
+    )
+
+    parser.add_argument(
+        "--parse-cache-size",
+        type=int,
+        help="Size in MB the parse cache may grow to.",
+        default=1024,
+    )
+
+    parser.add_argument(
+        "--period",
+        type=str,
+        choices=["day", "month"],
+        help="How much of the Record goes in each file in ndjson do_mode.",
+        default="day",
+    )
+
+    parser.add_argument(
+        "--compression",
+        type=str,
+        choices=["gzip", "zstd"],
+        help="Compress files written in ndjson do_mode.",
+    )
+
+    parser.add_argument(
+        "--dsn",
+        type=str,
+        help="In pg do_mode, COPY straight into this Postgres database \
+        (a libpq connection string) instead of writing csv files.",
+    )
+
+    parser.add_argument(
+        "--es-url",
+        type=str,
+        help="Elasticsearch cluster url for es do_mode.",
+        default="http://localhost:9200",
+    )
+
+    parser.add_argument(
+        "--index",
+        type=str,
+        help="Elasticsearch index for es do_mode.",
+        default="congressionalrecord",
+    )
+
+    parser.add_argument(
+        "--sqlite-path",
+        type=str,
+        help="Database file for sqlite do_mode.",
+        default="output/congressionalrecord.sqlite",
+    )
+
+    parser.add_argument(
+        "--json-backend",
+        type=str,
+        choices=["orjson", "json"],
+        help="Library to write JSON with. Defaults to orjson if installed.",
+    )
+
+    parser.add_argument(
+        "--stats-json",
+        type=str,
+        help="Write the run's timers and counters to this file as JSON.",
+    )
+
+    parser.add_argument(
+        "--stats-prom",
+        type=str,
+        help="Write the run's timers and counters to this Prometheus textfile.",
+    )
+
     args = parser.parse_args()
     logging.basicConfig(filename=args.logfile, level=logging.DEBUG)
     logging.info("Logging begins")
-    if args.csvpath and args.do_mode == "pg":
-        cr(args.start, end=args.end, do_mode="yield", csvpath=args.csvpath)
+    options = dict(
+        end=args.end,
+        jobs=args.jobs,
+        days_in_flight=args.days_in_flight,
+        per_host=args.per_host,
+        keep_zip=args.keep_zip,
+        json_backend=args.json_backend,
+        spans=args.spans,
+        regex_engine=args.regex_engine,
+        parse_cache=args.parse_cache,
+        parse_cache_bytes=args.parse_cache_size * 2**20,
+    )
+    if args.stats_json or args.stats_prom:
+        collector = stats.enable()
+    if args.dsn and args.do_mode == "pg":
+        crCopyToPG(args.start, args.dsn, **options)
+    elif args.csvpath and args.do_mode == "pg":
+        cr(args.start, do_mode="yield", csvpath=args.csvpath, **options)
     elif args.do_mode == "pg":
-        cr(args.start, end=args.end, do_mode="yield")
+        cr(args.start, do_mode="yield", **options)
     elif args.do_mode == "json":
-        dl(args.start, end=args.end, do_mode="json")
+        dl(args.start, do_mode="json", incremental=args.incremental, **options)
+    elif args.do_mode == "ndjson":
+        dl(
+            args.start,
+            do_mode="ndjson",
+            period=args.period,
+            compression=args.compression,
+            **options,
+        )
+    elif args.do_mode == "es":
+        dl(args.start, do_mode="es", es_url=args.es_url, index=args.index, **options)
+    elif args.do_mode == "sqlite":
+        dl(args.start, do_mode="sqlite", sqlite_path=args.sqlite_path, **options)
+    elif args.do_mode == "parquet":
+        dl(args.start, do_mode="parquet", **options)
     else:
         print("Haven't written the hooks for other functionality yet.")
 
+    if args.stats_json:
+        collector.write_json(args.stats_json)
+    if args.stats_prom:
+        collector.write_prometheus(args.stats_prom)
+
     logging.info("Logging ends")
 
 
@@ -0,0 +1,145 @@
+"""
+An on-disk cache of parsed granules.
+
+Entries are crdocs serialized as JSON and named by a hash of everything
+the parse depends on: the granule's HTML and mods block (see
+ParseCRDir.source_hash), the parser, and the options that change the
+output. Re-running the same days for a new output format or sink reads
+the crdocs back instead of parsing again.
+
+The parser is identified by the package version and a hash of the
+parser's own source files, so editing the parser without bumping the
+version still misses the cache rather than returning stale results.
+
+The cache is bounded by size. Reading an entry touches it, and once the
+cache outgrows max_bytes the least recently used entries are deleted
+until it is back under low_water of that. Several processes may share
+one cache: entries are written atomically, and one that disappears
+between lookup and read is a miss.
+"""
+
+from __future__ import absolute_import
+
+import hashlib
+import logging
+import os
+import tempfile
+from functools import lru_cache
+from importlib.metadata import version
+
+from .serialization import get_backend
+from .subclasses import ContentItem
+
+# the modules whose code decides what a crdoc looks like
+parser_modules = ["cr_parser.py", "subclasses.py", "classifier.py"]
+
+
+@lru_cache(maxsize=1)
+def parser_fingerprint():
+    """The package version and a hash of the parser's source."""
+    digest = hashlib.sha256()
+    here = os.path.dirname(os.path.abspath(__file__))
+    for name in parser_modules:
+        with open(os.path.join(here, name), "rb") as source_file:
+            digest.update(source_file.read())
+    return "{}+{}".format(version("congressionalrecord"), digest.hexdigest()[:16])
+
+
+class ParseCache(object):
+    """
+    A directory of cached crdocs, at most about max_bytes in size.
+    Plain attributes only, so it can be handed to worker processes.
+    """
+
+    suffix = ".json"
+
+    def key(self, source_hash, spans=False):
+        """The cache key for a granule with this source hash."""
+        digest = hashlib.sha256()
+        for part in [source_hash, parser_fingerprint(), "spans" if spans else ""]:
+            digest.update(part.encode("utf-8"))
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    def path(self, key):
+        return os.path.join(self.cache_dir, key[:2], key + self.suffix)
+
+    def get(self, key):
+        """The cached crdoc for key, or None."""
+        path = self.path(key)
+        try:
+            with open(path, "rb") as cached:
+                data = cached.read()
+            # mark it recently used
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        try:
+            crdoc = self.serializer.loads(data)
+        except ValueError:
+            logging.warning("Ignoring unreadable cache entry {}".format(path))
+            return None
+        crdoc["content"] = [ContentItem.from_dict(item) for item in crdoc["content"]]
+        return crdoc
+
+    def put(self, key, crdoc):
+        path = self.path(key)
+        data = self.serializer.dumps(crdoc)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_fd, tmp_path = tempfile.mkstemp(
+            prefix=key + ".", suffix=".part", dir=os.path.dirname(path)
+        )
+        with os.fdopen(tmp_fd, "wb") as out_file:
+            out_file.write(data)
+        os.replace(tmp_path, path)
+        self.size += len(data)
+        if self.size > self.max_bytes:
+            self.evict()
+
+    def entries(self):
+        """(mtime, size, path) for every entry."""
+        entries = []
+        for bucket in os.scandir(self.cache_dir):
+            if not bucket.is_dir():
+                continue
+            for entry in os.scandir(bucket.path):
+                if not entry.name.endswith(self.suffix):
+                    continue
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        return entries
+
+    def evict(self):
+        """Delete the least recently used entries until the cache is
+        under low_water of max_bytes."""
+        entries = sorted(self.entries())
+        self.size = sum(size for mtime, size, path in entries)
+        target = self.max_bytes * self.low_water
+        evicted = 0
+        for mtime, size, path in entries:
+            if self.size <= target:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            self.size -= size
+            evicted += 1
+        if evicted:
+            logging.info("Evicted {} entries from {}".format(evicted, self.cache_dir))
+
+    def __init__(self, cache_dir, max_bytes=2**30, low_water=0.9):
+        """
+        cache_dir : Directory for the cache, created if need be.
+        max_bytes : Size the cache may grow to before eviction.
+        low_water : Fraction of max_bytes that eviction shrinks it to.
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.low_water = low_water
+        self.serializer = get_backend()
+        os.makedirs(cache_dir, exist_ok=True)
+        self.size = sum(size for mtime, size, path in self.entries())
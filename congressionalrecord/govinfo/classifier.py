@@ -0,0 +1,489 @@
+"""
+Compiled line classifier for the item_types rule table.
+
+crItem used to loop over every pattern string with re.match for each
+line of a granule, once to name the item and twice more (is_break,
+is_skip) for every line that followed. A LineClassifier compiles the
+rule table once and answers all three questions in a single call.
+
+Ahead of the regexes sits a cheap prefilter. For each pattern we work
+out which characters a match can start with, and which characters can
+be the first non-blank character of a match. Lines are bucketed on
+those two characters, and only the rules that could match a bucket are
+tried. Wrapped prose starts with a letter and indented lines rarely start
+with one of the words the recorder rules look for, so most lines are
+tried against a rule or two, if any.
+
+To see which rules cost the most, enable_profiling() makes classify
+count the attempts, hits and match time of every pattern it tries, in
+a PatternProfile, until disable_profiling().
+
+Patterns run on re by default. With engine="re2" and google-re2
+installed, each pattern that RE2 can compile runs on it instead, in
+linear time; the rest (lookaheads, mostly) stay on re. RE2's whitespace,
+word and digit classes are ASCII-only, so other lines always go to re.
+
+Some re patterns backtrack badly on long lines. Those named as guarded
+aren't tried against lines longer than max_guarded_line, and a guarded
+match that takes longer than slow_match seconds is logged.
+"""
+
+from __future__ import absolute_import
+
+import logging
+import re
+import threading
+import time
+from collections import namedtuple
+from functools import lru_cache
+from types import MappingProxyType
+
+# kind    : the first item_types kind with a matching pattern, or None.
+# params  : the compiled parameters for that kind.
+# speaker : the speaker that kind implies for the line.
+# breaks  : some break_flow pattern matches the line.
+# skips   : some skip pattern matches the line and no break_flow pattern does.
+LineClass = namedtuple("LineClass", ["kind", "params", "speaker", "breaks", "skips"])
+
+NO_MATCH = LineClass(None, None, None, False, False)
+
+try:
+    # re's own parser is private, so the prefilter is optional: without
+    # it every lead is None and every rule is tried on every line.
+    from re import _constants as sre_constants
+    from re import _parser as sre_parser
+
+    _CATEGORIES = {
+        sre_constants.CATEGORY_SPACE: r"\s",
+        sre_constants.CATEGORY_NOT_SPACE: r"\S",
+        sre_constants.CATEGORY_DIGIT: r"\d",
+        sre_constants.CATEGORY_NOT_DIGIT: r"\D",
+        sre_constants.CATEGORY_WORD: r"\w",
+        sre_constants.CATEGORY_NOT_WORD: r"\W",
+    }
+
+    _ZERO_WIDTH = (sre_constants.AT, sre_constants.ASSERT, sre_constants.ASSERT_NOT)
+    _REPEATS = (
+        sre_constants.MAX_REPEAT,
+        sre_constants.MIN_REPEAT,
+        sre_constants.POSSESSIVE_REPEAT,
+    )
+
+    # U+3000 is the last code point for which str.isspace() is true
+    _LAST_BLANK = 0x3000
+    _BLANKS = [chr(i) for i in range(_LAST_BLANK + 1) if chr(i).isspace()]
+except (ImportError, AttributeError):
+    sre_constants = sre_parser = None
+
+try:
+    import re2
+except ImportError:
+    re2 = None
+
+_profile = None
+
+# re_allcaps takes about 8ms on a 1,000 character line and grows with
+# the square of the length; real lines are under 100.
+max_guarded_line = 1000
+slow_match = 0.05
+
+
+class _AnyChar(Exception):
+    """Raised when a pattern's leading character can't be pinned down."""
+
+
+def _set_member(in_op, in_av):
+    """Return (snippet, blank_only) for one member of a [...] set."""
+    if in_op == sre_constants.LITERAL:
+        return re.escape(chr(in_av)), chr(in_av).isspace()
+    if in_op == sre_constants.RANGE:
+        low, high = in_av
+        return "[{}-{}]".format(re.escape(chr(low)), re.escape(chr(high))), False
+    if in_op == sre_constants.CATEGORY and in_av in _CATEGORIES:
+        return _CATEGORIES[in_av], in_av == sre_constants.CATEGORY_SPACE
+    raise _AnyChar()
+
+
+def _lead_of_item(op, av, skip_blanks):
+    """
+    Return (leads, transparent) for one node of a parsed pattern.
+
+    leads is a set of regex snippets that each match one character the
+    node could start with. transparent is True when the node can match
+    without consuming anything -- or, with skip_blanks, while consuming
+    only whitespace -- so the lead may come from the node after it.
+    """
+    if op == sre_constants.LITERAL:
+        if skip_blanks and chr(av).isspace():
+            return set(), True
+        return {re.escape(chr(av))}, False
+    if op == sre_constants.IN:
+        leads, transparent = set(), False
+        for in_op, in_av in av:
+            snippet, blank_only = _set_member(in_op, in_av)
+            if skip_blanks and blank_only:
+                transparent = True
+                continue
+            if skip_blanks and any(re.match(snippet, ch) for ch in _BLANKS):
+                transparent = True
+            leads.add(snippet)
+        return leads, transparent
+    if op in _ZERO_WIDTH:
+        return set(), True
+    if op == sre_constants.SUBPATTERN:
+        group, add_flags, del_flags, sub = av
+        if add_flags or del_flags:
+            raise _AnyChar()
+        return _lead_of_seq(sub, skip_blanks)
+    if op == sre_constants.ATOMIC_GROUP:
+        return _lead_of_seq(av, skip_blanks)
+    if op == sre_constants.BRANCH:
+        leads, transparent = set(), False
+        for alt in av[1]:
+            alt_leads, alt_transparent = _lead_of_seq(alt, skip_blanks)
+            leads |= alt_leads
+            transparent = transparent or alt_transparent
+        return leads, transparent
+    if op in _REPEATS:
+        low, high, sub = av
+        leads, transparent = _lead_of_seq(sub, skip_blanks)
+        return leads, transparent or low == 0
+    raise _AnyChar()
+
+
+def _lead_of_seq(seq, skip_blanks):
+    leads = set()
+    for op, av in seq:
+        item_leads, transparent = _lead_of_item(op, av, skip_blanks)
+        leads |= item_leads
+        if not transparent:
+            return leads, False
+    return leads, True
+
+
+@lru_cache(maxsize=256)
+def lead_pattern(pattern, skip_blanks=False):
+    """
+    Compile a regex matching any single character that a match of
+    pattern (via re.match) could start with or, with skip_blanks, that
+    could be the first non-whitespace character of a match. Returns None
+    when that could be anything, or when the match could be empty
+    (all whitespace, with skip_blanks).
+    """
+    if sre_parser is None or not isinstance(pattern, str):
+        return None
+    try:
+        parsed = sre_parser.parse(pattern)
+        if parsed.state.flags & re.IGNORECASE:
+            return None
+        leads, transparent = _lead_of_seq(parsed, skip_blanks)
+    except (_AnyChar, re.error, AttributeError, TypeError, ValueError):
+        return None
+    if transparent:
+        return None
+    return re.compile("|".join(sorted(leads)))
+
+
+class _TimedPattern(object):
+    """A compiled pattern whose match() adds to a PatternProfile entry."""
+
+    __slots__ = ("compiled", "entry", "lock")
+
+    def match(self, line):
+        start = time.perf_counter_ns()
+        amatch = self.compiled.match(line)
+        elapsed = time.perf_counter_ns() - start
+        with self.lock:
+            self.entry[0] += 1
+            self.entry[1] += amatch is not None
+            self.entry[2] += elapsed
+        return amatch
+
+    def __init__(self, compiled, entry, lock):
+        self.compiled = compiled
+        self.entry = entry
+        self.lock = lock
+
+
+class _RE2Pattern(object):
+    """A pattern compiled for RE2, with re for lines RE2 would read
+    differently."""
+
+    __slots__ = ("compiled", "fallback", "pattern")
+
+    def match(self, line):
+        if line.isascii():
+            return self.compiled.match(line)
+        return self.fallback.match(line)
+
+    def __init__(self, compiled, fallback):
+        self.compiled = compiled
+        self.fallback = fallback
+        self.pattern = fallback.pattern
+
+
+class _GuardedPattern(object):
+    """A compiled pattern that refuses lines long enough to stall it and
+    logs slow matches."""
+
+    __slots__ = ("compiled", "pattern")
+
+    def match(self, line):
+        if len(line) > max_guarded_line:
+            logging.warning(
+                "Not matching a {} character line against {}: {!r}...".format(
+                    len(line), self.pattern[:40], line[:80]
+                )
+            )
+            return None
+        start = time.perf_counter()
+        amatch = self.compiled.match(line)
+        elapsed = time.perf_counter() - start
+        if elapsed > slow_match:
+            logging.warning(
+                "Matching {} took {:.3f}s on {!r}".format(
+                    self.pattern[:40], elapsed, line[:80]
+                )
+            )
+        return amatch
+
+    def __init__(self, compiled):
+        self.compiled = compiled
+        self.pattern = compiled.pattern
+
+
+@lru_cache(maxsize=256)
+def compile_pattern(pattern, engine="re", guarded=False):
+    """
+    Compile pattern for engine, "re" or "re2". Under re2, a pattern RE2
+    can't compile falls back to re. A guarded pattern that ends up on
+    re is wrapped in a _GuardedPattern.
+    """
+    compiled = re.compile(pattern)
+    if engine == "re2":
+        if re2 is None:
+            raise ImportError("The re2 regex engine needs the google-re2 package")
+        options = re2.Options()
+        options.log_errors = False
+        try:
+            return _RE2Pattern(re2.compile(pattern, options), compiled)
+        except re2.error:
+            logging.debug("re2 can't compile {}, using re".format(pattern[:40]))
+    elif engine != "re":
+        raise ValueError("Unknown regex engine {}".format(engine))
+    if guarded:
+        return _GuardedPattern(compiled)
+    return compiled
+
+
+class PatternProfile(object):
+    """
+    Attempts, hits and cumulative match time for each rule pattern,
+    over every line classified while it is enabled.
+
+    A pattern is named by its kind and its place among the kind's
+    patterns, so the speech pattern, which is built for each granule,
+    adds up across granules. Lines parsed in worker processes (jobs > 1)
+    are not seen.
+    """
+
+    def timed(self, kind, position, compiled):
+        with self.lock:
+            entry = self.entries.get((kind, position))
+            if entry is None:
+                # attempts, hits, nanoseconds, pattern
+                entry = self.entries[kind, position] = [0, 0, 0, compiled.pattern]
+            elif entry[3] != compiled.pattern:
+                entry[3] = None
+        return _TimedPattern(compiled, entry, self.lock)
+
+    def ranked(self):
+        """(kind, position, attempts, hits, seconds, pattern) tuples,
+        most time first. pattern is None where it varies by granule."""
+        with self.lock:
+            rows = [
+                (kind, position, attempts, hits, nanoseconds / 1e9, pattern)
+                for (kind, position), (attempts, hits, nanoseconds, pattern) in (
+                    self.entries.items()
+                )
+            ]
+        return sorted(rows, key=lambda row: row[4], reverse=True)
+
+    def report(self, width=60):
+        """The ranked table as text, patterns cut to width."""
+        lines = [
+            "{} lines classified".format(self.lines),
+            "{:>4} {:<28} {:>9} {:>7} {:>6} {:>9} {:>8}  {}".format(
+                "rank", "kind", "attempts", "hits", "hit%", "ms", "us/try", "pattern"
+            ),
+        ]
+        for rank, (kind, position, attempts, hits, seconds, pattern) in enumerate(
+            self.ranked(), 1
+        ):
+            if pattern is None:
+                pattern = "(varies by granule)"
+            elif len(pattern) > width:
+                pattern = pattern[: width - 3] + "..."
+            lines.append(
+                "{:>4} {:<28} {:>9} {:>7} {:>6.1f} {:>9.2f} {:>8.2f}  {}".format(
+                    rank,
+                    "{}[{}]".format(kind, position),
+                    attempts,
+                    hits,
+                    100.0 * hits / attempts if attempts else 0.0,
+                    seconds * 1e3,
+                    seconds * 1e6 / attempts if attempts else 0.0,
+                    pattern,
+                )
+            )
+        return "\n".join(lines)
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        # (kind, position) -> [attempts, hits, nanoseconds, pattern]
+        self.entries = {}
+        self.lines = 0
+
+
+def enable_profiling(profile=None):
+    """Profile every classify call, into profile or a new PatternProfile,
+    and return it."""
+    global _profile
+    _profile = profile if profile is not None else PatternProfile()
+    return _profile
+
+
+def disable_profiling():
+    """Stop profiling. Returns the PatternProfile that was in use, if any."""
+    global _profile
+    profile, _profile = _profile, None
+    return profile
+
+
+class LineClassifier(object):
+    """
+    Classify lines against an item_types rule table.
+
+    Build one with LineClassifier.from_item_types(); identical rule tables
+    share a single compiled classifier.
+    """
+
+    def __init__(self, rules):
+        # rules: ((kind, params, compiled, lead, blank_lead), ...)
+        # in item_types order
+        self.rules = rules
+        # Filled in lazily. Threads that race on a bucket just build the
+        # same tuple twice, so this needs no lock.
+        self._buckets = {}
+        # (profile, timed rules, their buckets), built on the first
+        # classify call under a profile; the same benign race applies
+        self._profiled = None
+
+    @classmethod
+    def from_item_types(cls, item_types, engine="re", guarded=()):
+        """
+        The classifier for item_types, with its patterns compiled for
+        engine. Patterns in guarded are guarded on re (see above).
+        """
+        key = tuple(
+            (
+                kind,
+                tuple(params["patterns"]),
+                params["break_flow"],
+                params["speaker_re"],
+                params.get("speaker_group"),
+                params.get("speaker"),
+            )
+            for kind, params in item_types.items()
+        )
+        return _compile_rules(key, engine, frozenset(guarded))
+
+    def _bucket(self, first, first_nonblank, all_rules, buckets):
+        """The rules that could match a line that starts this way."""
+        rules = tuple(
+            (kind, params, compiled)
+            for kind, params, compiled, lead, blank_lead in all_rules
+            if (lead is None or (first and lead.match(first)))
+            and (
+                blank_lead is None
+                or (first_nonblank and blank_lead.match(first_nonblank))
+            )
+        )
+        buckets[first, first_nonblank] = rules
+        return rules
+
+    def _profiled_rules(self, profile):
+        """self.rules with each pattern timed into profile, and the
+        buckets for them."""
+        if self._profiled is None or self._profiled[0] is not profile:
+            rules = []
+            positions = {}
+            for kind, params, compiled, lead, blank_lead in self.rules:
+                position = positions[kind] = positions.get(kind, -1) + 1
+                timed = profile.timed(kind, position, compiled)
+                rules.append((kind, params, timed, lead, blank_lead))
+            self._profiled = (profile, tuple(rules), {})
+        return self._profiled[1], self._profiled[2]
+
+    def classify(self, line):
+        """
+        Return a LineClass for line. This is the same answer crItem used
+        to get from walking item_types in order with re.match, plus the
+        break and skip flags for the line.
+        """
+        first, first_nonblank = line[:1], line.lstrip()[:1]
+        all_rules, buckets = self.rules, self._buckets
+        profile = _profile
+        if profile is not None:
+            all_rules, buckets = self._profiled_rules(profile)
+            with profile.lock:
+                profile.lines += 1
+        rules = buckets.get((first, first_nonblank))
+        if rules is None:
+            rules = self._bucket(first, first_nonblank, all_rules, buckets)
+        found = None
+        for kind, params, compiled in rules:
+            amatch = compiled.match(line)
+            if not amatch:
+                continue
+            if found is None:
+                found = (kind, params, amatch)
+            if params["break_flow"]:
+                breaks = True
+                break
+        else:
+            if found is None:
+                return NO_MATCH
+            breaks = False
+        kind, params, amatch = found
+        if params["speaker_re"]:
+            speaker = amatch.group(params["speaker_group"])
+        else:
+            speaker = params["speaker"]
+        return LineClass(kind, params, speaker, breaks, not breaks)
+
+
+@lru_cache(maxsize=64)
+def _compile_rules(key, engine, guarded):
+    rules = []
+    for kind, patterns, break_flow, speaker_re, speaker_group, speaker in key:
+        # shared by every granule with this rule table, so read-only
+        params = MappingProxyType(
+            {
+                "break_flow": break_flow,
+                "speaker_re": speaker_re,
+                "speaker_group": speaker_group,
+                "speaker": speaker,
+            }
+        )
+        for pat in patterns:
+            rules.append(
+                (
+                    kind,
+                    params,
+                    compile_pattern(pat, engine, pat in guarded),
+                    lead_pattern(pat),
+                    lead_pattern(pat, skip_blanks=True),
+                )
+            )
+    return LineClassifier(tuple(rules))
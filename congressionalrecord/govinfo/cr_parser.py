@@ -1,28 +1,219 @@
 from __future__ import absolute_import
 
+import hashlib
+import html
+import io
 import itertools
 import logging
 import os
 import re
+from collections.abc import Mapping
 from datetime import datetime
+from functools import lru_cache
+from types import MappingProxyType
+from zipfile import ZipFile
 
 from bs4 import BeautifulSoup
+from lxml import etree
 
+from . import stats
+from .classifier import LineClassifier
 from .subclasses import crItem
 
 
+# Granule HTML is a <pre> block of text with the odd <a> link or
+# pseudo-tag (<bullet>, <INF>) in it. extract_pre handles that shape
+# without building a DOM and returns None for anything else.
+re_pre_tag = re.compile(r"</?[A-Za-z][-\w:]*(?:\s[^<>]*)?>")
+re_pre_entity = re.compile(r"&(?:amp|lt|gt|quot|apos|#[0-9]+|#[xX][0-9a-fA-F]+);")
+re_pre_ampersand = re.compile(r"&[#\w]")
+
+
+def extract_pre(htm_text):
+    """Return the text of the first <pre> block in htm_text, with
+    tags dropped and entities unescaped, the way BeautifulSoup's
+    htm_text.pre.text would. Returns None when the file isn't the
+    simple shape we expect, so the caller can fall back to the soup."""
+    if htm_text.count("<pre") != 1 or "<PRE" in htm_text:
+        return None
+    start = htm_text.find("<pre>")
+    end = htm_text.find("</pre>", start)
+    if start == -1 or end == -1:
+        return None
+    pre_text = htm_text[start + len("<pre>") : end]
+    if "<!" in pre_text:
+        return None
+    pre_text = re_pre_tag.sub("", pre_text)
+    # stray brackets, and the two characters lxml rewrites
+    if any(ch in pre_text for ch in "<>\r\x00"):
+        return None
+    if "&" not in pre_text:
+        return pre_text
+    if re_pre_ampersand.search(re_pre_entity.sub("", pre_text)):
+        return None
+    # a bare "& " is just an ampersand to the soup as well
+    return re_pre_entity.sub(lambda m: html.unescape(m.group(0)), pre_text)
+
+
+# Speaker names go into the speech regex as-is, so "." in "Mr. SMITH"
+# is a wildcard and "(SC)" is a group. Names made only of these
+# characters can be folded into a trie without changing what matches.
+re_trie_safe_name = re.compile(r"^[\w .,'\-()]*$")
+
+
+def _name_trie_regex(node):
+    """Return (regex, first index) for a trie node. Branches are tried
+    in the order their names appeared, like the flat alternation."""
+    alts = []
+    for char, child in node.items():
+        if char == "":
+            alts.append((child, ""))
+        else:
+            sub_regex, first = _name_trie_regex(child)
+            token = char if char == "." else re.escape(char)
+            alts.append((first, token + sub_regex))
+    alts.sort()
+    if len(alts) == 1:
+        return alts[0][1], alts[0][0]
+    return "(?:" + "|".join(alt for first, alt in alts) + ")", alts[0][0]
+
+
+@lru_cache(maxsize=256)
+def speaker_alternation(names):
+    """
+    Regex source matching any of names (a tuple, in mods order),
+    the way "|".join(names) does, but as a prefix trie so that a
+    line is walked once instead of once per name. Granules from
+    the same day share most speakers, so this is cached on the
+    names.
+    """
+    trie = {}
+    for index, name in enumerate(names):
+        if not re_trie_safe_name.match(name):
+            return "|".join(names)
+        if name.count("(") != name.count(")"):
+            # unbalanced parens; let re complain as it always has
+            return "|".join(names)
+        literal = name.replace("(", "").replace(")", "")
+        node = trie
+        for char in literal:
+            node = node.setdefault(char, {})
+        node.setdefault("", index)
+    if not trie:
+        return ""
+    return _name_trie_regex(trie)[0]
+
+
 class ParseCRDir(object):
     def gen_dir_metadata(self):
         """Load up all metadata for this directory
-        from the mods file."""
-        with open(self.mods_path, "r") as mods_file:
-            self.mods = BeautifulSoup(mods_file, "lxml")
+        from the mods file.
+
+        One pass over mods.xml indexes each granule's metadata
+        block by accessId, so ParseCRFile doesn't have to search
+        the whole tree for every granule."""
+        self.granules = {}
+        with self.open_file(self.mods_path, "rb") as mods_file:
+            mods_tree = etree.parse(mods_file)
+        for access_tag in mods_tree.iter("{*}accessId"):
+            access_id = access_tag.text
+            if access_id is not None and access_id not in self.granules:
+                self.granules[access_id] = etree.tostring(
+                    access_tag.getparent(), encoding="unicode", with_tail=False
+                )
+
+    def granule_ref(self, access_id):
+        """The metadata tag for one granule, or None if the
+        mods file doesn't list it."""
+        granule_xml = self.granules.get(access_id)
+        if granule_xml is None:
+            return None
+        access_tag = BeautifulSoup(granule_xml, "lxml").find(
+            "accessid", string=access_id
+        )
+        return access_tag.parent
+
+    @property
+    def mods(self):
+        """The whole mods file as soup, loaded on first use."""
+        if self._mods is None:
+            with self.open_file(self.mods_path) as mods_file:
+                self._mods = BeautifulSoup(mods_file, "lxml")
+        return self._mods
+
+    def member(self, path):
+        """The archive member name for a path under cr_dir."""
+        return os.path.relpath(path, os.path.dirname(self.cr_dir)).replace(
+            os.sep, "/"
+        )
+
+    def open_file(self, path, mode="r"):
+        """
+        Open a file under cr_dir for reading, in text or binary mode.
+        With an archive, the file is read from the zip package instead
+        of the extracted tree.
+        """
+        if self.archive is None:
+            return open(path, mode)
+        member_file = self.archive.open(self.member(path))
+        if "b" in mode:
+            return member_file
+        # the same decoding and newline handling open() would give us
+        return io.TextIOWrapper(member_file)
+
+    def listdir(self, path):
+        """Like os.listdir for a directory under cr_dir."""
+        if self.archive is None:
+            return os.listdir(path)
+        prefix = self.member(path) + "/"
+        return [
+            name[len(prefix) :]
+            for name in self.archive.namelist()
+            if name.startswith(prefix) and "/" not in name[len(prefix) :]
+        ]
+
+    def getsize(self, path):
+        """Like os.path.getsize for a file under cr_dir."""
+        if self.archive is None:
+            return os.path.getsize(path)
+        return self.archive.getinfo(self.member(path)).file_size
+
+    def source_hash(self, path):
+        """
+        A hash of everything a granule is parsed from: its HTML and its
+        metadata block in mods.xml.
+        """
+        access_id = os.path.basename(path).split(".")[0]
+        digest = hashlib.sha256()
+        with self.open_file(path, "rb") as htm_file:
+            digest.update(htm_file.read())
+        digest.update(b"\0")
+        digest.update(self.granules.get(access_id, "").encode("utf-8"))
+        return digest.hexdigest()
+
+    def close(self):
+        if self.archive is not None:
+            self.archive.close()
 
     def __init__(self, abspath, **kwargs):
+        """
+        abspath is the day's directory, CREC-YYYY-MM-DD.
+
+        Optional arguments:
+
+        archive : Path to the day's zip package. Files are read from the
+                  package's CREC-YYYY-MM-DD/ members instead of from
+                  abspath, which need not exist.
+        """
         # dir data
         self.cr_dir = abspath
         self.mods_path = os.path.join(self.cr_dir, "mods.xml")
         self.html_path = os.path.join(self.cr_dir, "html")
+        if kwargs.get("archive"):
+            self.archive = ZipFile(kwargs["archive"], "r")
+        else:
+            self.archive = None
+        self._mods = None
         self.gen_dir_metadata()
 
 
@@ -113,6 +304,8 @@ class ParseCRFile(object):
     re_excerpt = r"\s+(_{3,4})"
     re_newpage = r"\s*\[\[Page \w+\]\]"
     re_timestamp = r"\s+\{time\}\s+\d{4}"
+    # patterns that backtrack badly on long lines
+    guarded_patterns = (re_allcaps, re_recorderstart)
 
     # Metadata-making functions
     def title_id(self):
@@ -121,12 +314,12 @@ class ParseCRFile(object):
         return id_num
 
     def make_re_newspeaker(self):
-        speaker_list = "|".join(
-            [
+        speaker_list = speaker_alternation(
+            tuple(
                 mbr
                 for mbr in list(self.speakers.keys())
                 if self.speakers[mbr]["role"] == "SPEAKING"
-            ]
+            )
         )
         if len(speaker_list) > 0:
             re_speakers = (
@@ -138,6 +331,25 @@ class ParseCRFile(object):
             re_speakers = r"^(\s{1,2}|<bullet>)(?P<name>((((Mr)|(Ms)|(Mrs)|(Miss))\. (([-A-Z\'])(\s)?)+( of [A-Z][a-z]+)?)|((The ((VICE|ACTING|Acting) )?(PRESIDENT|SPEAKER|CHAIR(MAN)?)( pro tempore)?)|(The PRESIDING OFFICER)|(The CLERK)|(The CHIEF JUSTICE)|(The VICE PRESIDENT)|(Mr\. Counsel [A-Z]+))( \([A-Za-z.\- ]+\))?))(?:\.|(, ))"
         return re_speakers
 
+    def make_item_types(self):
+        """
+        This granule's own item_types: the class-level table with the
+        speech patterns swapped for this granule's speaker regex. The
+        class-level table is shared by every ParseCRFile, including
+        ones parsing on other threads, so it is never written to.
+        """
+        item_types = {}
+        for kind, params in type(self).item_types.items():
+            if kind == "speech":
+                params = dict(params, patterns=[self.re_newspeaker])
+            item_types[kind] = MappingProxyType(params)
+        return MappingProxyType(item_types)
+
+    def make_classifier(self):
+        return LineClassifier.from_item_types(
+            self.item_types, engine=self.regex_engine, guarded=self.guarded_patterns
+        )
+
     def people_helper(self, tagobject):
         output_dict = {}
         if "bioguideid" in tagobject.attrs:
@@ -310,7 +522,7 @@ class ParseCRFile(object):
         full_text = ""
         if "content" in self.crdoc and isinstance(self.crdoc["content"], list):
             for item in self.crdoc["content"]:
-                if isinstance(item, dict) and "text" in item:
+                if isinstance(item, Mapping) and "text" in item:
                     full_text += item["text"] + "\n"
 
         # Simple pattern to find committee names (lines with "Committee on" or similar)
@@ -401,12 +613,12 @@ class ParseCRFile(object):
                 logging.info("Could not extract a document timestamp.")
 
     # Flow control for metadata generation
+    @stats.timed("gen_file_metadata")
     def gen_file_metadata(self):
         # Sometimes the searchtitle has semicolons in it so .split(';') is a nogo
-        temp_ref = self.cr_dir.mods.find("accessid", text=self.access_path)
-        if temp_ref is None:
+        self.doc_ref = self.cr_dir.granule_ref(self.access_path)
+        if self.doc_ref is None:
             raise RuntimeError("{} doesn't have accessid tag".format(self.access_path))
-        self.doc_ref = temp_ref.parent
         matchobj = re.match(self.re_vol, self.doc_ref.searchtitle.string)
         if matchobj:
             self.doc_title, self.cr_vol, self.cr_num = matchobj.group(
@@ -425,7 +637,7 @@ class ParseCRFile(object):
         self.find_committee_resignations()
         self.chamber = self.doc_ref.granuleclass.string
         self.re_newspeaker = self.make_re_newspeaker()
-        self.item_types["speech"]["patterns"] = [self.re_newspeaker]
+        self.item_types = self.make_item_types()
 
     # That's it for metadata. Below deals with content.
 
@@ -443,15 +655,28 @@ class ParseCRFile(object):
         and the same way by all object methods.
         """
         self.lines_remaining = True
-        with open(self.filepath, "r") as htm_file:
-            htm_lines = htm_file.read()
-            htm_text = BeautifulSoup(htm_lines, "lxml")
-        text = htm_text.pre.text.split("\n")
+        # Items in spans mode point back into this
+        self.pre_text = self.read_pre_text()
+        text = self.pre_text.split("\n")
+        offset = 0
         for line in text:
             self.cur_line = line
+            self.cur_offset = offset
+            offset += len(line) + 1
             yield line
         self.lines_remaining = False
 
+    @stats.timed("read_htm_file")
+    def read_pre_text(self):
+        """The text of the granule's <pre> block."""
+        with self.cr_dir.open_file(self.filepath) as htm_file:
+            htm_lines = htm_file.read()
+        pre_text = extract_pre(htm_lines)
+        if pre_text is None:
+            logging.debug("Souping {}, no simple <pre> block".format(self.filepath))
+            pre_text = BeautifulSoup(htm_lines, "lxml").pre.text
+        return pre_text
+
     def get_header(self):
         """
         Only after I wrote this did I realize
@@ -562,6 +787,7 @@ class ParseCRFile(object):
 
         return None
 
+    @stats.timed("write_page")
     def write_page(self):
         turn = 0
         itemno = 0
@@ -594,6 +820,9 @@ class ParseCRFile(object):
                 break
 
         self.crdoc["content"] = the_content
+        collector = stats.current()
+        if collector is not None:
+            collector.count_items(the_content)
 
         logging.debug(
             "Stopped writing {0}. The last line is: {1}".format(
@@ -610,6 +839,9 @@ class ParseCRFile(object):
         self.write_page()
         # Extract committee elections/resignations if applicable
         self.extract_committee_data_from_content()
+        collector = stats.current()
+        if collector is not None:
+            collector.count("granules_parsed")
 
     """
     This is a dict of line cases.
@@ -624,7 +856,7 @@ class ParseCRFile(object):
                                      <pattern from patterns>).
                                      .group(<speaker_group>)
     else: speaker = <speaker>
-    (ALSO -- see line 176 for how speech patterns is populated)
+    (ALSO -- see make_item_types for how speech patterns is populated)
     It has to come after some of the functions because of
     how I want to handle special cases.
     """
@@ -744,6 +976,10 @@ class ParseCRFile(object):
         self.doc_related_bills = []
         self.crdoc["committee_elections"] = None
         self.crdoc["committee_resignations"] = None
+        # Items keep offsets into the granule text instead of copies
+        self.spans = kwargs.get("spans", False)
+        # "re" or "re2", for the line classifier
+        self.regex_engine = kwargs.get("regex_engine", "re")
 
         # file data
         self.filepath = abspath
@@ -751,6 +987,19 @@ class ParseCRFile(object):
         self.cr_dir = cr_dir
         self.access_path = self.filename.split(".")[0]
 
+        # A ParseCache. On a hit, crdoc comes from it and nothing is
+        # parsed, so the metadata attributes below are never set.
+        self.cache = kwargs.get("cache")
+        if self.cache is not None:
+            cache_key = self.cache.key(cr_dir.source_hash(abspath), self.spans)
+            cached = self.cache.get(cache_key)
+            collector = stats.current()
+            if collector is not None:
+                collector.count("parse_cache", label="hit" if cached else "miss")
+            if cached is not None:
+                self.crdoc = cached
+                return
+
         # Generate all metadata including list of speakers
         self.gen_file_metadata()
         # Must come after speaker list generation
@@ -761,6 +1010,9 @@ class ParseCRFile(object):
                 self.item_breakers.extend(x["patterns"])
             else:
                 self.skip_items.extend(x["patterns"])
+        self.classifier = self.make_classifier()
 
         # Parse the file
         self.parse()
+        if self.cache is not None:
+            self.cache.put(cache_key, self.crdoc)
@@ -1,10 +1,12 @@
 from __future__ import absolute_import
 
-import json
 import logging
+import multiprocessing
 import os
+import tempfile
+from collections import deque, namedtuple
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime, timedelta
-from io import BytesIO
 from zipfile import BadZipfile, ZipFile
 
 import certifi
@@ -12,10 +14,64 @@ import urllib3
 from importlib.metadata import version
 from urllib3 import PoolManager, Retry, Timeout
 
+from .cache import ParseCache
 from .cr_parser import ParseCRDir, ParseCRFile
+from .manifest import GranuleManifest
+from . import stats
+from .serialization import get_backend
+from .sinks import ESBulkSink, NDJSONSink, ParquetSink, SQLiteSink
 
 VERSION = version("congressionalrecord")
 
+# What bulkdownload yields when it parses in worker processes: the parts
+# of a ParseCRFile that callers read, without the soup behind it.
+ParsedGranule = namedtuple("ParsedGranule", ["filepath", "crdoc"])
+
+# Each worker process keeps the ParseCRDir for the day it is working on.
+_worker_crdir = None
+
+
+def _parse_granule(dir_path, archive, parse_path, parse_options, collect=False):
+    """
+    Parse one granule in a worker process. Returns the ParsedGranule
+    and, if collect, the stats for parsing it, for the parent to merge.
+    """
+    global _worker_crdir
+    if collect:
+        collector = stats.enable()
+    try:
+        if _worker_crdir is None or _worker_crdir.cr_dir != dir_path:
+            if _worker_crdir is not None:
+                _worker_crdir.close()
+            _worker_crdir = ParseCRDir(dir_path, archive=archive)
+        crfile = ParseCRFile(parse_path, _worker_crdir, **parse_options)
+    finally:
+        if collect:
+            stats.disable()
+    granule = ParsedGranule(crfile.filepath, crfile.crdoc)
+    return granule, collector.as_dict() if collect else None
+
+
+def day_granules(crdir):
+    """
+    The granules in a ParseCRDir's html directory that bulkdownload
+    parses, in sorted order.
+    """
+    parse_paths = []
+    for the_file in sorted(crdir.listdir(crdir.html_path)):
+        parse_path = os.path.join(crdir.html_path, the_file)
+        if any(
+            (
+                "-PgD" in parse_path,
+                "FrontMatter" in parse_path,
+                "-Pgnull" in parse_path,
+            )
+        ):
+            logging.info("Skipping {}".format(parse_path))
+        else:
+            parse_paths.append(parse_path)
+    return parse_paths
+
 
 class Downloader(object):
     """
@@ -23,17 +79,134 @@ class Downloader(object):
     to elasticsearch or yield json.
     """
 
+    def parse_day(self, dir_path, pool=None, archive=None, skip=None, **parse_options):
+        """
+        Parse the granules of one day, in sorted order, from dir_path
+        or from the zip package at archive. Granules for which
+        skip(crdir, parse_path) is true are left out. parse_options
+        (spans, regex_engine, cache) are passed on to ParseCRFile.
+        Without a pool, yield ParseCRFile objects. With one, parse in
+        the pool's worker processes, biggest granules first so the
+        workers finish together, and yield ParsedGranule tuples.
+        """
+        crdir = ParseCRDir(dir_path, archive=archive)
+        try:
+            parse_paths = day_granules(crdir)
+            if skip is not None:
+                parse_paths = [
+                    parse_path
+                    for parse_path in parse_paths
+                    if not skip(crdir, parse_path)
+                ]
+            if pool is None:
+                for parse_path in parse_paths:
+                    yield ParseCRFile(parse_path, crdir, **parse_options)
+                return
+            futures = {}
+            for parse_path in sorted(parse_paths, key=crdir.getsize, reverse=True):
+                futures[parse_path] = pool.submit(
+                    _parse_granule,
+                    dir_path,
+                    archive,
+                    parse_path,
+                    parse_options,
+                    stats.current() is not None,
+                )
+            try:
+                for parse_path in parse_paths:
+                    granule, totals = futures[parse_path].result()
+                    if totals is not None and stats.current() is not None:
+                        stats.current().merge(totals)
+                    yield granule
+            finally:
+                for future in futures.values():
+                    future.cancel()
+        finally:
+            crdir.close()
+
+    def skip_unchanged(self, crdir, parse_path):
+        """
+        For incremental runs: true if the manifest says parse_path was
+        already written from the same source by this parser version.
+        """
+        day_dir = crdir.cr_dir
+        if day_dir not in self.manifests:
+            self.manifests[day_dir] = GranuleManifest(day_dir)
+        access_id = os.path.basename(parse_path).split(".")[0]
+        source_hash = crdir.source_hash(parse_path)
+        if self.manifests[day_dir].is_current(
+            access_id, source_hash, self.parser_version
+        ):
+            logging.info("{} is unchanged, skipping.".format(access_id))
+            return True
+        self.source_hashes[parse_path] = source_hash
+        return False
+
     def bulkdownload(self, start, parse=True, **kwargs):
+        jobs = kwargs.get("jobs") or 1
+        if parse and jobs > 1:
+            # spawn rather than fork, since download threads may be
+            # holding locks when a worker starts
+            with ProcessPoolExecutor(
+                max_workers=jobs, mp_context=multiprocessing.get_context("spawn")
+            ) as pool:
+                yield from self._bulkdownload(start, parse, pool, **kwargs)
+        else:
+            yield from self._bulkdownload(start, parse, None, **kwargs)
+
+    def extract_days(self, start, **kwargs):
+        """
+        Download and extract each day from start to end, yielding
+        (day, GovInfoExtract) in date order. With days_in_flight > 1,
+        that many days are fetched at once on threads that share one
+        PoolManager, which opens at most per_host connections to a host.
+        """
         day = datetime.strptime(start, "%Y-%m-%d")
         if "end" in list(kwargs.keys()):
             end = kwargs["end"]
         else:
             end = start
         end_day = datetime.strptime(end, "%Y-%m-%d")
+        days = []
         while day <= end_day:
-            day_str = datetime.strftime(day, "%Y-%m-%d")
-            extractor = GovInfoExtract(day_str, **kwargs)
+            days.append(day)
+            day += timedelta(days=1)
+        in_flight = kwargs.get("days_in_flight") or 1
+        if in_flight == 1:
+            for day in days:
+                day_str = datetime.strftime(day, "%Y-%m-%d")
+                yield day, GovInfoExtract(day_str, **kwargs)
+            return
+        kwargs.setdefault(
+            "http", downloadRequest.pool_manager(kwargs.get("per_host") or in_flight)
+        )
+        with ThreadPoolExecutor(max_workers=in_flight) as executor:
+            pending = deque()
+            try:
+                for day in days:
+                    day_str = datetime.strftime(day, "%Y-%m-%d")
+                    pending.append(
+                        (day, executor.submit(GovInfoExtract, day_str, **kwargs))
+                    )
+                    if len(pending) > in_flight:
+                        day, extracting = pending.popleft()
+                        yield day, extracting.result()
+                while pending:
+                    day, extracting = pending.popleft()
+                    yield day, extracting.result()
+            finally:
+                for day, extracting in pending:
+                    extracting.cancel()
+
+    def _bulkdownload(self, start, parse, pool, **kwargs):
+        cache = None
+        if parse and kwargs.get("parse_cache"):
+            cache = ParseCache(
+                kwargs["parse_cache"], kwargs.get("parse_cache_bytes") or 2**30
+            )
+        for day, extractor in self.extract_days(start, **kwargs):
             self.status = extractor.status
+            day_str = datetime.strftime(day, "%Y-%m-%d")
             if self.status == 404:
                 logging.info("bulkdownloader skipping a missing day.")
             elif parse:
@@ -45,25 +218,19 @@ class Downloader(object):
                     outpath = kwargs["outpath"]
                 try:
                     dir_path = os.path.join(outpath, year_str, dir_str)
-                    crdir = ParseCRDir(dir_path)
-                    for the_file in os.listdir(os.path.join(dir_path, "html")):
-                        parse_path = os.path.join(dir_path, "html", the_file)
-                        if any(
-                            (
-                                "-PgD" in parse_path,
-                                "FrontMatter" in parse_path,
-                                "-Pgnull" in parse_path,
-                            )
-                        ):
-                            logging.info("Skipping {}".format(parse_path))
-                        else:
-                            crfile = ParseCRFile(parse_path, crdir)
-                            yield crfile
+                    yield from self.parse_day(
+                        dir_path,
+                        pool,
+                        extractor.archive,
+                        kwargs.get("skip"),
+                        spans=kwargs.get("spans", False),
+                        regex_engine=kwargs.get("regex_engine", "re"),
+                        cache=cache,
+                    )
                 except IOError as e:
                     logging.warning("{}, skipping.".format(e))
             else:
                 logging.warning("Unexpected condition in bulkdownloader")
-            day += timedelta(days=1)
 
     def __init__(self, start, **kwargs):
         """
@@ -89,6 +256,51 @@ class Downloader(object):
                   to 'output' and works fine when you run it from the repo's root
                   directory.
 
+        jobs : Number of worker processes to parse granules with. Defaults
+               to 1, which parses in this process and yields ParseCRFile
+               objects. With more, each worker keeps its own ParseCRDir and
+               the downloader yields ParsedGranule (filepath, crdoc) tuples,
+               in the same order.
+
+        days_in_flight : Number of days to download and extract at once,
+                         ahead of the day being parsed. Defaults to 1.
+
+        per_host : With days_in_flight, the most connections to open to
+                   one host. Defaults to days_in_flight.
+
+        keep_zip : Defaults to False. If True, keep each day's zip package
+                   instead of extracting it, and parse straight from the
+                   package. Days already extracted are parsed from disk.
+
+        progress : A callable, progress(url, bytes_received, total_bytes),
+                   called as each package downloads. total_bytes is None
+                   when the server doesn't say.
+
+        incremental : Defaults to False. In json mode, keep a manifest.json
+                      in each day directory recording every granule's
+                      source hash, parser version and output path, and
+                      skip granules whose entry is still current.
+
+        spans : Defaults to False. If True, content items keep [start, end)
+                offsets into their granule's text, output as "spans",
+                instead of copies of it. An item's text is built from its
+                spans when something reads it.
+
+        regex_engine : "re" (the default) or "re2", to classify lines with
+                       google-re2 where the patterns allow it.
+
+        parse_cache : A directory to cache parsed granules in, keyed by a
+                      hash of their source and the parser. Granules found
+                      there are read back instead of parsed.
+
+        parse_cache_bytes : Size the parse cache may grow to before its
+                            least recently used entries are deleted.
+                            Defaults to 1 GiB.
+
+        json_backend : "orjson" or "json", the library that writes JSON in
+                       the json, ndjson and es modes. Defaults to orjson
+                       when it is installed.
+
         do_mode : Specify what kind of data you want from the parser.
                   If do_mode is not set, the downloader will do absolutely zilch.
                   do_mode can take the following values:
@@ -98,14 +310,40 @@ class Downloader(object):
 
                   es : Specify the URL and index of an ElasticSearch cluster with
                        arguments es_url and index, and it will pass each file to
-                       that cluster for indexing. WARNING: This doesn't handle any
-                       mappings, and it doesn't check to see if records are already
-                       there, so it will overwrite old files in the same index
-                       WITHOUT versioning.
+                       that cluster for indexing through the _bulk API. Granules
+                       go to index and their content items to index-items, under
+                       ids made from the granule's accessId, so indexing a day
+                       again overwrites it. WARNING: This doesn't handle any
+                       mappings.
 
                        also specify:
                        es_url : ElasticSearch cluster url
                        index  : ElasticSearch cluster index
+                       es_options : optional dict of ESBulkSink arguments,
+                                    e.g. batch_size and concurrency.
+
+                  ndjson : write each day's granules, one crdoc per line,
+                           to outpath/YEAR/CREC-YYYY-MM-DD.ndjson.
+
+                           also specify, optionally:
+                           period      : "day" (the default) or "month", for
+                                         one file per month instead.
+                           compression : "gzip" or "zstd".
+
+                  parquet : write documents, items and bills tables to
+                            Parquet datasets under outpath/parquet,
+                            partitioned by year and chamber. Needs pyarrow.
+
+                            also specify, optionally:
+                            parquet_options : dict of ParquetSink arguments,
+                                              batch_size and compression.
+
+                  sqlite : load documents, items and bills into a SQLite
+                           database with a full-text index on item text.
+
+                           also specify, optionally:
+                           sqlite_path : the database file. Defaults to
+                                         outpath/congressionalrecord.sqlite.
 
                   yield : For each day of the Record the user specifies,
                           the downloader acts like a generator, yielding that day's
@@ -114,24 +352,75 @@ class Downloader(object):
         self.status = "idle"
         logging.debug("Downloader object ready with params:")
         logging.debug(
-            ", ".join(["=".join([key, value]) for key, value in list(kwargs.items())])
+            ", ".join(
+                ["{}={}".format(key, value) for key, value in list(kwargs.items())]
+            )
         )
         if "outpath" in list(kwargs.keys()):
             outpath = kwargs["outpath"]
         else:
             outpath = "output"
+        serializer = get_backend(kwargs.get("json_backend"))
+        # spans change the output, so the manifest tells the two apart
+        self.parser_version = VERSION + ("+spans" if kwargs.get("spans") else "")
         if kwargs["do_mode"] == "json":
+            self.manifests = {}
+            self.source_hashes = {}
+            if kwargs.get("incremental"):
+                kwargs["skip"] = self.skip_unchanged
             # outpath called so often to make it easy to follow
             # the idea that we're traversing a directory tree
             for crfile in self.bulkdownload(start, **kwargs):
                 filename = os.path.split(crfile.filepath)[-1].split(".")[0] + ".json"
                 outpath = os.path.split(crfile.filepath)[0]
                 outpath = os.path.split(outpath)[0]
-                if "json" not in os.listdir(outpath):
-                    os.mkdir(os.path.join(outpath, "json"))
+                day_dir = outpath
+                # with keep_zip, nothing else makes the day directory
+                os.makedirs(os.path.join(outpath, "json"), exist_ok=True)
                 outpath = os.path.join(outpath, "json", filename)
-                with open(outpath, "w") as out_json:
-                    json.dump(crfile.crdoc, out_json)
+                with open(outpath, "wb") as out_json:
+                    serializer.dump(crfile.crdoc, out_json)
+                if crfile.filepath in self.source_hashes:
+                    self.manifests[day_dir].record(
+                        crfile.crdoc["id"],
+                        self.source_hashes.pop(crfile.filepath),
+                        self.parser_version,
+                        outpath,
+                    )
+                    # days are parsed one at a time, so earlier days are done
+                    for done_dir in [d for d in self.manifests if d != day_dir]:
+                        self.manifests.pop(done_dir).save()
+            for manifest in self.manifests.values():
+                manifest.save()
+        elif kwargs["do_mode"] == "ndjson":
+            with NDJSONSink(
+                outpath,
+                period=kwargs.get("period", "day"),
+                compression=kwargs.get("compression"),
+                serializer=serializer,
+            ) as sink:
+                for crfile in self.bulkdownload(start, **kwargs):
+                    sink.write(crfile)
+        elif kwargs["do_mode"] == "es":
+            with ESBulkSink(
+                kwargs["es_url"],
+                kwargs["index"],
+                serializer=serializer,
+                **kwargs.get("es_options", {}),
+            ) as sink:
+                for crfile in self.bulkdownload(start, **kwargs):
+                    sink.write(crfile)
+        elif kwargs["do_mode"] == "sqlite":
+            sqlite_path = kwargs.get(
+                "sqlite_path", os.path.join(outpath, "congressionalrecord.sqlite")
+            )
+            with SQLiteSink(sqlite_path) as sink:
+                for crfile in self.bulkdownload(start, **kwargs):
+                    sink.write(crfile)
+        elif kwargs["do_mode"] == "parquet":
+            with ParquetSink(outpath, **kwargs.get("parquet_options", {})) as sink:
+                for crfile in self.bulkdownload(start, **kwargs):
+                    sink.write(crfile)
         elif kwargs["do_mode"] == "yield":
             self.yielded = self.bulkdownload(start, parse=True, **kwargs)
         elif kwargs["do_mode"] == "noparse":
@@ -141,6 +430,58 @@ class Downloader(object):
             return None
 
 
+def iter_documents(
+    start,
+    end=None,
+    outpath="output",
+    jobs=1,
+    days_in_flight=1,
+    per_host=None,
+    keep_zip=False,
+    spans=False,
+    regex_engine="re",
+    progress=None,
+    parse_cache=None,
+):
+    """
+    Download and parse the Record from start to end (both 'YYYY-MM-DD',
+    end defaulting to start), yielding one ParsedGranule (filepath,
+    crdoc) per granule, day by day and in sorted order within a day.
+
+    Nothing is downloaded or parsed until the first document is asked
+    for, and no more than that after: with jobs=1 each granule is parsed
+    as it is requested, with more the current day is parsed in worker
+    processes, and downloads run at most days_in_flight days ahead. So
+    at most one day of parsed documents is in memory at a time, and
+    breaking out of the loop (or closing the generator) stops the work.
+
+    The documents are plain tuples with no reference back to the parser.
+    The other arguments are as for Downloader.
+    """
+    downloader = Downloader(
+        start,
+        end=end or start,
+        do_mode="yield",
+        outpath=outpath,
+        jobs=jobs,
+        days_in_flight=days_in_flight,
+        per_host=per_host,
+        keep_zip=keep_zip,
+        spans=spans,
+        regex_engine=regex_engine,
+        progress=progress,
+        parse_cache=parse_cache,
+    )
+    # map, unlike a for loop, keeps no hold on the last ParseCRFile
+    yield from map(_detached, downloader.yielded)
+
+
+def _detached(crfile):
+    if isinstance(crfile, ParsedGranule):
+        return crfile
+    return ParsedGranule(crfile.filepath, crfile.crdoc)
+
+
 class downloadRequest(object):
     user_agent = {
         "user-agent": "congressional-record {} (https://github.com/unitedstates/congressional-record)".format(
@@ -151,59 +492,120 @@ class downloadRequest(object):
     timeout = Timeout(connect=2.0, read=10.0)
     retry = Retry(total=3, backoff_factor=300)
     retry.BACKOFF_MAX = 602
-    http = PoolManager(
-        timeout=timeout,
-        retries=retry,
-        cert_reqs="CERT_REQUIRED",
-        ca_certs=certifi.where(),
-        headers=user_agent,
-    )
+    chunk_size = 2**16
+
+    @classmethod
+    def pool_manager(cls, per_host=1, block=True):
+        """
+        A PoolManager with the request settings above. With block, a
+        request to a host that already has per_host connections open
+        waits for one of them to free up.
+        """
+        return PoolManager(
+            timeout=cls.timeout,
+            retries=cls.retry,
+            cert_reqs="CERT_REQUIRED",
+            ca_certs=certifi.where(),
+            headers=cls.user_agent,
+            maxsize=per_host,
+            block=block,
+        )
+
+    def stream_to(self, r, url, filename, progress=None):
+        """
+        Write the body of response r to a temporary file next to
+        filename, chunk by chunk. If it holds a valid zip package,
+        rename it to filename and return True. Otherwise remove it.
+        """
+        total = r.headers.get("Content-Length")
+        total = int(total) if total and total.isdigit() else None
+        received = 0
+        tmp_fd, tmp_path = tempfile.mkstemp(
+            prefix=os.path.basename(filename) + ".",
+            suffix=".part",
+            dir=os.path.dirname(filename) or ".",
+        )
+        try:
+            with os.fdopen(tmp_fd, "wb") as outfile:
+                for chunk in r.stream(self.chunk_size):
+                    outfile.write(chunk)
+                    received += len(chunk)
+                    if progress is not None:
+                        progress(url, received, total)
+            collector = stats.current()
+            if collector is not None:
+                collector.count("bytes_downloaded", received)
+            if received == 0:
+                logging.warning("Empty response body for {}".format(url))
+                return False
+            logging.info("Sniff sniff: Does this smell like a ZIP file?")
+            try:
+                with ZipFile(tmp_path):
+                    pass
+            except BadZipfile:
+                logging.warning(
+                    "File {} is not a valid ZIP file (BadZipFile)".format(url)
+                )
+                return False
+            os.replace(tmp_path, filename)
+            logging.info("Wrote {} ({} bytes)".format(filename, received))
+            return True
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
 
-    def __init__(self, url, filename):
+    @stats.timed("download")
+    def __init__(self, url, filename, http=None, progress=None):
+        """
+        Download url to filename, streaming the body to disk so memory
+        use doesn't grow with the package. progress, if given, is called
+        as progress(url, bytes_received, total_bytes) after each chunk;
+        total_bytes is None when the server doesn't send a length.
+        """
         self.status = False
+        if http is not None:
+            self.http = http
         try:
             logging.info("Sending request on {}".format(self.its_today))
-            r = self.http.request("GET", url)
-            logging.debug("Request headers received with code {}".format(r.status))
-            if r.status == 404:
-                logging.warning("Received 404, not retrying request.")
-                self.status = 404
-            elif r.status == 200 and r.data:
-                logging.info("Considering download request successful.")
-                logging.info("Sniff sniff: Does this smell like a ZIP file?")
-                with BytesIO(r.data) as thepackage:
-                    try:
-                        ZipFile(thepackage)
-                        self.binary_content = r.data
-                        self.status = True
-                    except BadZipfile:
-                        logging.warning(
-                            "File {} is not a valid ZIP file (BadZipFile)".format(url)
+            r = self.http.request("GET", url, preload_content=False)
+            try:
+                logging.debug(
+                    "Request headers received with code {}".format(r.status)
+                )
+                if r.status == 404:
+                    logging.warning("Received 404, not retrying request.")
+                    self.status = 404
+                elif r.status == 200:
+                    logging.info("Considering download request successful.")
+                    self.status = self.stream_to(r, url, filename, progress)
+                else:
+                    logging.warning(
+                        "Unexpected condition, not continuing:\
+                    {}".format(
+                            r.status
                         )
-                        self.status = False
-            else:
-                logging.warning(
-                    "Unexpected condition, not continuing:\
-                {}".format(
-                        r.status
                     )
-                )
-        except urllib3.exceptions.MaxRetryError as ce:
+            finally:
+                r.release_conn()
+        except (
+            urllib3.exceptions.MaxRetryError,
+            urllib3.exceptions.ProtocolError,
+            urllib3.exceptions.ReadTimeoutError,
+        ) as ce:
             logging.warning("Error: %s - Aborting download" % ce)
+            self.status = False
         if self.status == False:
             logging.warning("Failed to download file {}".format(url))
         elif self.status == 404:
             logging.info("downloadRequester skipping file that returned 404.")
-        elif self.binary_content:
-            with open(filename, "wb") as outfile:
-                outfile.write(self.binary_content)
-            logging.info("Wrote {}".format(filename))
-        else:
-            logging.info(
-                "No download for {} and terminating with unexpected condition.\n".format(
-                    url
-                )
-            )
+        collector = stats.current()
+        if collector is not None:
+            outcomes = {True: "ok", 404: "404"}
+            collector.count("downloads", label=outcomes.get(self.status, "failed"))
+
+
+# Shared by every request that isn't handed a PoolManager of its own.
+downloadRequest.http = downloadRequest.pool_manager(block=False)
 
 
 class GovInfoDL(object):
@@ -215,10 +617,11 @@ class GovInfoDL(object):
         the_url = self.govinfo_cr_download_base + day + ".zip"
         dl_time = datetime.strptime(day, "%Y-%m-%d")
         year = str(dl_time.year)
-        if year not in os.listdir(outpath):
-            os.mkdir(os.path.join(outpath, year))
+        os.makedirs(os.path.join(outpath, year), exist_ok=True)
         the_filename = os.path.join(outpath, year, "CREC-" + day + ".zip")
-        the_download = downloadRequest(the_url, the_filename)
+        the_download = downloadRequest(
+            the_url, the_filename, http=self.http, progress=self.progress
+        )
         self.status = the_download.status
         if self.status == False:
             logging.warning(
@@ -241,12 +644,14 @@ class GovInfoDL(object):
             self.outpath = kwargs["outpath"]
         else:
             self.outpath = "output"
+        self.http = kwargs.get("http")
+        self.progress = kwargs.get("progress")
         self.download_day(day, self.outpath)
 
 
 class GovInfoExtract(object):
-    def __init__(self, day, **kwargs):
-        self.status = "idle"
+    @stats.timed("extract")
+    def fetch(self, day, **kwargs):
         if not datetime.strptime(day, "%Y-%m-%d"):
             raise Exception("Malformed date field. Must be YYYY-MM-DD")
         dl_time = datetime.strptime(day, "%Y-%m-%d")
@@ -255,27 +660,49 @@ class GovInfoExtract(object):
             outpath = "output"
         else:
             outpath = kwargs["outpath"]
-        if not os.path.isdir(outpath):
-            os.makedirs(outpath)
+        # days may be extracted on several threads at once
+        os.makedirs(os.path.join(outpath, year), exist_ok=True)
         abspath = os.path.join(outpath, year, "CREC-" + day + ".zip")
         extract_to = "CREC-" + day
-        if year not in os.listdir(outpath):
-            os.mkdir(os.path.join(outpath, year))
         if extract_to in os.listdir(os.path.join(outpath, year)):
             logging.info("{} already exists in extraction tree.".format(extract_to))
             self.status = "existingFiles"
             return None
         if extract_to + ".zip" not in os.listdir(os.path.join(outpath, year)):
-            the_dl = GovInfoDL(day, outpath=outpath)
+            the_dl = GovInfoDL(
+                day,
+                outpath=outpath,
+                http=kwargs.get("http"),
+                progress=kwargs.get("progress"),
+            )
             self.status = the_dl.status
             if self.status is not True:
                 logging.info("No record on this day, not trying to extract")
                 self.status = "downloadFailure"
                 return None
+        if kwargs.get("keep_zip"):
+            logging.info("Keeping {} to parse from".format(abspath))
+            self.archive = abspath
+            self.status = "keptZip"
+            return None
         with ZipFile(abspath, "r") as the_zip:  # errors here
             the_zip.extractall(os.path.join(outpath, year))
             logging.info("Extracted to {}".format(os.path.join(outpath, year)))
             self.status = "extractedFiles"
         os.remove(abspath)
         self.status += "deletedZip"
+
+    def __init__(self, day, **kwargs):
+        """
+        Make sure day is on disk, downloading it if need be.
+        Unless keep_zip is set, the package is extracted and deleted.
+        With keep_zip, archive is the path of the package to parse
+        from, and the status is "keptZip".
+        """
+        self.status = "idle"
+        self.archive = None
+        self.fetch(day, **kwargs)
+        collector = stats.current()
+        if collector is not None:
+            collector.count("days", label=self.status)
         logging.info("Extractor completed with status {}".format(self.status))
@@ -0,0 +1,63 @@
+from __future__ import absolute_import
+
+import json
+import logging
+import os
+import tempfile
+
+
+class GranuleManifest(object):
+    """
+    A record of the granules written for one day of the Record: for
+    each accessId, the hash of its source, the parser version that
+    wrote it and where the output went. It lives in the day directory
+    as manifest.json.
+    """
+
+    filename = "manifest.json"
+
+    def is_current(self, access_id, source_hash, parser_version):
+        """True if access_id was written from this source by this parser
+        version and its output is still there."""
+        entry = self.granules.get(access_id)
+        return (
+            entry is not None
+            and entry["source_hash"] == source_hash
+            and entry["parser_version"] == parser_version
+            and os.path.exists(entry["output"])
+        )
+
+    def record(self, access_id, source_hash, parser_version, output):
+        self.granules[access_id] = {
+            "source_hash": source_hash,
+            "parser_version": parser_version,
+            "output": output,
+        }
+        self.changed = True
+
+    def save(self):
+        """Write the manifest if anything was recorded, replacing the
+        old one only once the new one is complete."""
+        if not self.changed:
+            return
+        os.makedirs(self.day_dir, exist_ok=True)
+        tmp_fd, tmp_path = tempfile.mkstemp(
+            prefix=self.filename + ".", suffix=".part", dir=self.day_dir
+        )
+        with os.fdopen(tmp_fd, "w") as out_json:
+            json.dump(self.granules, out_json, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.path)
+        self.changed = False
+        logging.info("Wrote {}".format(self.path))
+
+    def __init__(self, day_dir):
+        self.day_dir = day_dir
+        self.path = os.path.join(day_dir, self.filename)
+        self.changed = False
+        self.granules = {}
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, "r") as in_json:
+                    self.granules = json.load(in_json)
+            except ValueError:
+                logging.warning("Ignoring unreadable manifest {}".format(self.path))
@@ -0,0 +1,75 @@
+"""
+JSON serialization backends.
+
+Everything that writes crdocs as JSON goes through a backend, which
+turns an object into UTF-8 bytes. get_backend() picks orjson when it is
+installed and the stdlib json module otherwise. The two agree on the
+data but not on the bytes: orjson writes compact JSON with non-ASCII
+characters as-is.
+
+Content items are ContentItem records rather than dicts while parsing;
+the backends turn them into dicts as they are written.
+"""
+
+from __future__ import absolute_import
+
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+from .subclasses import ContentItem
+
+
+def to_builtin(obj):
+    """The default hook for objects the encoders don't know."""
+    if isinstance(obj, ContentItem):
+        return obj.to_dict()
+    raise TypeError(
+        "Object of type {} is not JSON serializable".format(type(obj).__name__)
+    )
+
+
+class StdlibJSON(object):
+    name = "json"
+
+    def dumps(self, obj):
+        return json.dumps(obj, default=to_builtin).encode("utf-8")
+
+    def loads(self, data):
+        return json.loads(data)
+
+    def dump(self, obj, out_file):
+        """Write obj to a file opened in binary mode."""
+        out_file.write(self.dumps(obj))
+
+
+class OrJSON(StdlibJSON):
+    name = "orjson"
+
+    def dumps(self, obj):
+        return orjson.dumps(obj, default=to_builtin)
+
+    def loads(self, data):
+        return orjson.loads(data)
+
+    def __init__(self):
+        if orjson is None:
+            raise ImportError("The orjson JSON backend needs the orjson package")
+
+
+backends = {"json": StdlibJSON, "orjson": OrJSON}
+
+
+def get_backend(name=None):
+    """
+    A JSON backend by name, "json" or "orjson". With no name, the fastest
+    one installed.
+    """
+    if name is None:
+        name = "orjson" if orjson is not None else "json"
+    if name not in backends:
+        raise ValueError("Unknown JSON backend {}".format(name))
+    return backends[name]()
@@ -0,0 +1,632 @@
+"""
+Output sinks for parsed granules.
+
+A sink takes each parsed granule in turn through write(crfile), where
+crfile is anything with a crdoc (a ParseCRFile or a ParsedGranule), and
+finishes its output on close(). Sinks are context managers.
+"""
+
+from __future__ import absolute_import
+
+import gzip
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import urllib3
+
+from .serialization import get_backend
+
+try:
+    # Python 3.14+
+    from compression import zstd
+except ImportError:
+    try:
+        import zstandard as zstd
+    except ImportError:
+        zstd = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+re_crdoc_day = re.compile(
+    r"^CREC-(?P<year>[0-9]{4})-(?P<month>[0-9]{2})-(?P<day>[0-9]{2})"
+)
+
+
+class NDJSONSink(object):
+    """
+    Write granules as JSON Lines, one crdoc per line, to one file per day
+    (outpath/YEAR/CREC-YYYY-MM-DD.ndjson) or per month
+    (outpath/YEAR/CREC-YYYY-MM.ndjson), optionally gzip or zstd
+    compressed.
+
+    Lines are streamed to a .part file that is renamed into place when
+    the day or month is done. A file is rewritten from whatever granules
+    this run gives it, so with period="month" run whole months at a time.
+    """
+
+    extensions = {None: "", "gzip": ".gz", "zstd": ".zst"}
+
+    def path_for(self, crdoc):
+        """The output file a crdoc belongs in."""
+        match = re_crdoc_day.match(crdoc["id"])
+        if match is None:
+            raise ValueError("Can't date granule {}".format(crdoc["id"]))
+        year, month, day = match.group("year", "month", "day")
+        if self.period == "month":
+            name = "CREC-{}-{}".format(year, month)
+        else:
+            name = "CREC-{}-{}-{}".format(year, month, day)
+        return os.path.join(
+            self.outpath, year, name + ".ndjson" + self.extensions[self.compression]
+        )
+
+    def open_part(self, path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.raw_file = open(path + ".part", "wb")
+        if self.compression == "gzip":
+            stream = gzip.GzipFile(
+                filename=os.path.basename(path), mode="wb", fileobj=self.raw_file
+            )
+        elif self.compression == "zstd":
+            stream = zstd.open(self.raw_file, "wb")
+        else:
+            stream = self.raw_file
+        return stream
+
+    def finish(self, keep=True):
+        """
+        Close the current file and move it into place, or with keep
+        False, leave it as a .part file.
+        """
+        if self.out_file is None:
+            return
+        self.out_file.close()
+        # compressors given a file object leave it open
+        self.raw_file.close()
+        if keep:
+            os.replace(self.path + ".part", self.path)
+            logging.info("Wrote {} granules to {}".format(self.count, self.path))
+        else:
+            logging.warning("Left unfinished {}.part".format(self.path))
+        self.out_file = self.raw_file = self.path = None
+        self.count = 0
+
+    def write(self, crfile):
+        path = self.path_for(crfile.crdoc)
+        if path != self.path:
+            self.finish()
+            self.path = path
+            self.out_file = self.open_part(path)
+        self.out_file.write(self.serializer.dumps(crfile.crdoc) + b"\n")
+        self.count += 1
+
+    def close(self):
+        self.finish()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        # don't put a half-written file in place of a good one
+        self.finish(keep=exc_type is None)
+
+    def __init__(self, outpath, period="day", compression=None, serializer=None):
+        """
+        outpath : Root of the output tree, as for Downloader.
+        period : "day" or "month", how much of the Record goes in a file.
+        compression : None, "gzip" or "zstd". zstd needs Python 3.14's
+                      compression.zstd or the zstandard package.
+        serializer : A JSON backend from serialization.get_backend().
+                     Defaults to the fastest one installed.
+        """
+        if period not in ("day", "month"):
+            raise ValueError("period must be day or month, not {}".format(period))
+        if compression not in self.extensions:
+            raise ValueError("Unknown compression {}".format(compression))
+        if compression == "zstd" and zstd is None:
+            raise ImportError("zstd compression needs the zstandard package")
+        self.outpath = outpath
+        self.period = period
+        self.compression = compression
+        self.serializer = serializer or get_backend()
+        self.out_file = self.raw_file = self.path = None
+        self.count = 0
+
+
+class ParquetSink(object):
+    """
+    Write granules to three Parquet datasets under outpath/parquet:
+    documents (one row per granule), items (one row per content item)
+    and bills (one row per related bill). Each is partitioned by year
+    and chamber, hive-style (year=2005/chamber=Senate/), so readers can
+    skip partitions they filter out.
+
+    Rows are buffered and written batch_size granules at a time. Needs
+    pyarrow.
+    """
+
+    if pa is not None:
+        schemas = {
+            "documents": pa.schema(
+                [
+                    ("id", pa.string()),
+                    ("year", pa.int16()),
+                    ("chamber", pa.string()),
+                    ("month", pa.string()),
+                    ("day", pa.string()),
+                    ("wkday", pa.string()),
+                    ("vol", pa.string()),
+                    ("num", pa.string()),
+                    ("pages", pa.string()),
+                    ("extension", pa.bool_()),
+                    ("doc_title", pa.string()),
+                    ("title", pa.string()),
+                    ("document_type", pa.string()),
+                ]
+            ),
+            "items": pa.schema(
+                [
+                    ("id", pa.string()),
+                    ("year", pa.int16()),
+                    ("chamber", pa.string()),
+                    ("itemno", pa.int32()),
+                    ("kind", pa.string()),
+                    ("speaker", pa.string()),
+                    ("speaker_bioguide", pa.string()),
+                    ("turn", pa.int32()),
+                    ("text", pa.string()),
+                ]
+            ),
+            "bills": pa.schema(
+                [
+                    ("id", pa.string()),
+                    ("year", pa.int16()),
+                    ("chamber", pa.string()),
+                    ("congress", pa.string()),
+                    ("context", pa.string()),
+                    ("bill_type", pa.string()),
+                    ("bill_no", pa.string()),
+                ]
+            ),
+        }
+
+    partition_cols = ["year", "chamber"]
+
+    def add(self, crdoc):
+        """Break a crdoc into rows for the three tables."""
+        header = crdoc["header"] or {}
+        year = int(re_crdoc_day.match(crdoc["id"]).group("year"))
+        chamber = header.get("chamber") or "Unknown"
+        keys = {"id": crdoc["id"], "year": year, "chamber": chamber}
+        self.rows["documents"].append(
+            dict(
+                keys,
+                month=header.get("month"),
+                day=header.get("day"),
+                wkday=header.get("wkday"),
+                vol=header.get("vol"),
+                num=header.get("num"),
+                pages=header.get("pages"),
+                extension=header.get("extension"),
+                doc_title=crdoc.get("doc_title"),
+                title=crdoc.get("title"),
+                document_type=crdoc.get("document_type"),
+            )
+        )
+        for item in crdoc["content"]:
+            self.rows["items"].append(
+                dict(
+                    keys,
+                    itemno=item["itemno"],
+                    kind=item["kind"],
+                    speaker=item["speaker"],
+                    speaker_bioguide=item.get("speaker_bioguide"),
+                    turn=item.get("turn"),
+                    text=item["text"],
+                )
+            )
+        for bill in crdoc.get("related_bills", []):
+            self.rows["bills"].append(
+                dict(
+                    keys,
+                    congress=bill.get("congress"),
+                    context=bill.get("context"),
+                    bill_type=bill.get("type"),
+                    bill_no=bill.get("number"),
+                )
+            )
+
+    def flush(self):
+        """Write out the buffered rows as one file per partition."""
+        if not self.pending:
+            return
+        for table_name, rows in self.rows.items():
+            if not rows:
+                continue
+            table = pa.Table.from_pylist(rows, schema=self.schemas[table_name])
+            pq.write_to_dataset(
+                table,
+                root_path=os.path.join(self.outpath, "parquet", table_name),
+                partition_cols=self.partition_cols,
+                basename_template="part-{}-{}-{{i}}.parquet".format(
+                    self.run_id, self.batches
+                ),
+                existing_data_behavior="overwrite_or_ignore",
+                compression=self.compression,
+            )
+            rows.clear()
+        logging.info("Wrote {} granules to Parquet".format(self.pending))
+        self.batches += 1
+        self.pending = 0
+
+    def write(self, crfile):
+        self.add(crfile.crdoc)
+        self.pending += 1
+        if self.pending >= self.batch_size:
+            self.flush()
+
+    def close(self):
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __init__(self, outpath, batch_size=500, compression="zstd"):
+        """
+        outpath : Root of the output tree, as for Downloader.
+        batch_size : Granules to buffer before writing a batch of files.
+        compression : Parquet column compression, as pyarrow names it.
+        """
+        if pa is None:
+            raise ImportError("Parquet output needs the pyarrow package")
+        self.outpath = outpath
+        self.batch_size = batch_size
+        self.compression = compression
+        self.rows = {table_name: [] for table_name in self.schemas}
+        self.pending = 0
+        self.batches = 0
+        # keeps file names from separate runs apart
+        self.run_id = uuid.uuid4().hex[:12]
+
+
+class ESBulkSink(object):
+    """
+    Index granules into Elasticsearch through the _bulk API.
+
+    Each granule goes to index as one document, without its content,
+    under its accessId. Each content item goes to items_index as its own
+    document, under accessId-itemno. Ids don't change between runs, so
+    reindexing a day overwrites it instead of duplicating it.
+
+    Actions are sent batch_size granules (or about max_bytes of body) at
+    a time, with up to concurrency requests in flight. Once that many
+    are in flight, write() waits for one to finish, so a slow cluster
+    slows the parser instead of filling memory. Requests that get a 429
+    are retried with backoff.
+    """
+
+    def actions(self, crdoc):
+        """The bulk action and source lines for a crdoc."""
+        granule = {key: value for key, value in crdoc.items() if key != "content"}
+        granule["item_count"] = len(crdoc["content"])
+        dumps = self.serializer.dumps
+        lines = [
+            dumps({"index": {"_index": self.index, "_id": crdoc["id"]}}),
+            dumps(granule),
+        ]
+        header = crdoc["header"] or {}
+        for item in crdoc["content"]:
+            item_id = "{}-{}".format(crdoc["id"], item["itemno"])
+            source = dict(
+                item,
+                granule_id=crdoc["id"],
+                chamber=header.get("chamber"),
+                year=header.get("year"),
+                month=header.get("month"),
+                day=header.get("day"),
+            )
+            lines.append(
+                dumps({"index": {"_index": self.items_index, "_id": item_id}})
+            )
+            lines.append(dumps(source))
+        return lines
+
+    def post(self, body, granules):
+        """Send one _bulk request, retrying while the cluster says 429."""
+        try:
+            for attempt in range(self.retries + 1):
+                r = self.http.request(
+                    "POST",
+                    self.bulk_url,
+                    body=body,
+                    headers={"Content-Type": "application/x-ndjson"},
+                )
+                if r.status != 429:
+                    break
+                time.sleep(self.backoff * 2**attempt)
+            if r.status != 200:
+                raise RuntimeError(
+                    "_bulk request failed with {}: {}".format(r.status, r.data[:200])
+                )
+            result = json.loads(r.data)
+            failed = 0
+            if result.get("errors"):
+                for item in result.get("items", []):
+                    outcome = next(iter(item.values()))
+                    if outcome.get("error"):
+                        failed += 1
+                        logging.warning(
+                            "Indexing {} failed: {}".format(
+                                outcome.get("_id"), outcome["error"]
+                            )
+                        )
+            with self.lock:
+                self.granules_indexed += granules
+                self.actions_failed += failed
+        finally:
+            self.in_flight.release()
+
+    def send(self):
+        if not self.lines:
+            return
+        body = b"\n".join(self.lines) + b"\n"
+        granules = self.pending
+        self.lines = []
+        self.body_bytes = 0
+        self.pending = 0
+        # backpressure: wait here while concurrency requests are out
+        self.in_flight.acquire()
+        self.futures.append(self.executor.submit(self.post, body, granules))
+
+    def reap(self):
+        """Drop finished requests, raising the error from any that failed."""
+        pending = []
+        for future in self.futures:
+            if future.done():
+                future.result()
+            else:
+                pending.append(future)
+        self.futures = pending
+
+    def write(self, crfile):
+        self.reap()
+        lines = self.actions(crfile.crdoc)
+        self.lines.extend(lines)
+        self.body_bytes += sum(len(line) + 1 for line in lines)
+        self.pending += 1
+        if self.pending >= self.batch_size or self.body_bytes >= self.max_bytes:
+            self.send()
+
+    def close(self):
+        self.send()
+        self.executor.shutdown(wait=True)
+        for future in self.futures:
+            future.result()
+        logging.info(
+            "Indexed {} granules, {} failed actions".format(
+                self.granules_indexed, self.actions_failed
+            )
+        )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.executor.shutdown(wait=True)
+
+    def __init__(
+        self,
+        es_url,
+        index,
+        items_index=None,
+        batch_size=100,
+        max_bytes=2**22,
+        concurrency=2,
+        retries=5,
+        backoff=1.0,
+        serializer=None,
+    ):
+        """
+        es_url : Base URL of the cluster, e.g. http://localhost:9200
+        index : Index for granules.
+        items_index : Index for content items. Defaults to index-items.
+        batch_size : Granules per _bulk request.
+        max_bytes : Send a request early once its body gets this big.
+        concurrency : Most _bulk requests in flight at once.
+        retries, backoff : Retries for a 429, and the first wait in seconds.
+        serializer : A JSON backend from serialization.get_backend().
+        """
+        self.bulk_url = es_url.rstrip("/") + "/_bulk"
+        self.index = index
+        self.items_index = items_index or index + "-items"
+        self.batch_size = batch_size
+        self.max_bytes = max_bytes
+        self.retries = retries
+        self.backoff = backoff
+        self.serializer = serializer or get_backend()
+        self.http = urllib3.PoolManager(maxsize=concurrency, block=True)
+        self.executor = ThreadPoolExecutor(max_workers=concurrency)
+        self.in_flight = threading.BoundedSemaphore(concurrency)
+        self.lock = threading.Lock()
+        self.futures = []
+        self.lines = []
+        self.body_bytes = 0
+        self.pending = 0
+        self.granules_indexed = 0
+        self.actions_failed = 0
+
+
+class SQLiteSink(object):
+    """
+    Load granules into one SQLite database file: documents, items and
+    bills tables, plus items_fts, an FTS5 index over item text, e.g.
+
+        SELECT items.* FROM items_fts JOIN items ON items.rowid = items_fts.rowid
+        WHERE items_fts MATCH 'appropriations' ORDER BY rank;
+
+    The database runs in WAL mode so it can be read while it loads. Each
+    day is loaded in one transaction that first deletes the day's old
+    rows, so loading a day again replaces it.
+    """
+
+    schema = """
+    CREATE TABLE IF NOT EXISTS documents (
+        id TEXT PRIMARY KEY,
+        year TEXT, month TEXT, day TEXT, wkday TEXT,
+        chamber TEXT, extension INTEGER,
+        vol TEXT, num TEXT, pages TEXT,
+        doc_title TEXT, title TEXT, document_type TEXT
+    );
+    CREATE TABLE IF NOT EXISTS items (
+        id TEXT PRIMARY KEY,
+        doc_id TEXT NOT NULL REFERENCES documents(id),
+        itemno INTEGER, kind TEXT,
+        speaker TEXT, speaker_bioguide TEXT,
+        turn INTEGER, text TEXT
+    );
+    CREATE INDEX IF NOT EXISTS items_doc_ix ON items (doc_id);
+    CREATE INDEX IF NOT EXISTS items_bioguide_ix ON items (speaker_bioguide);
+    CREATE TABLE IF NOT EXISTS bills (
+        doc_id TEXT NOT NULL REFERENCES documents(id),
+        congress TEXT, context TEXT, bill_type TEXT, bill_no TEXT
+    );
+    CREATE INDEX IF NOT EXISTS bills_doc_ix ON bills (doc_id);
+    CREATE VIRTUAL TABLE IF NOT EXISTS items_fts USING fts5(
+        text, content='items', content_rowid='rowid'
+    );
+    CREATE TRIGGER IF NOT EXISTS items_fts_insert AFTER INSERT ON items BEGIN
+        INSERT INTO items_fts (rowid, text) VALUES (new.rowid, new.text);
+    END;
+    CREATE TRIGGER IF NOT EXISTS items_fts_delete AFTER DELETE ON items BEGIN
+        INSERT INTO items_fts (items_fts, rowid, text)
+        VALUES ('delete', old.rowid, old.text);
+    END;
+    """
+
+    def load_day(self):
+        if not self.day_docs:
+            return
+        documents, items, bills = [], [], []
+        for crdoc in self.day_docs:
+            header = crdoc["header"] or {}
+            documents.append(
+                (
+                    crdoc["id"],
+                    header.get("year"),
+                    header.get("month"),
+                    header.get("day"),
+                    header.get("wkday"),
+                    header.get("chamber"),
+                    header.get("extension"),
+                    header.get("vol"),
+                    header.get("num"),
+                    header.get("pages"),
+                    crdoc.get("doc_title"),
+                    crdoc.get("title"),
+                    crdoc.get("document_type"),
+                )
+            )
+            for item in crdoc["content"]:
+                items.append(
+                    (
+                        "{}-{}".format(crdoc["id"], item["itemno"]),
+                        crdoc["id"],
+                        item["itemno"],
+                        item["kind"],
+                        item["speaker"],
+                        item.get("speaker_bioguide"),
+                        item.get("turn"),
+                        item["text"],
+                    )
+                )
+            for bill in crdoc.get("related_bills", []):
+                bills.append(
+                    (
+                        crdoc["id"],
+                        bill.get("congress"),
+                        bill.get("context"),
+                        bill.get("type"),
+                        bill.get("number"),
+                    )
+                )
+        day_prefix = self.day + "-%"
+        # the connection's context manager is one transaction
+        with self.connection:
+            for table, key in [
+                ("bills", "doc_id"),
+                ("items", "doc_id"),
+                ("documents", "id"),
+            ]:
+                self.connection.execute(
+                    "DELETE FROM {} WHERE {} LIKE ?".format(table, key), (day_prefix,)
+                )
+            self.connection.executemany(
+                "INSERT INTO documents VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?)", documents
+            )
+            self.connection.executemany(
+                "INSERT INTO items (id, doc_id, itemno, kind, speaker,"
+                " speaker_bioguide, turn, text) VALUES (?,?,?,?,?,?,?,?)",
+                items,
+            )
+            self.connection.executemany("INSERT INTO bills VALUES (?,?,?,?,?)", bills)
+        logging.info(
+            "Loaded {}: {} documents, {} items, {} bills".format(
+                self.day, len(documents), len(items), len(bills)
+            )
+        )
+        self.day_docs = []
+
+    def write(self, crfile):
+        crdoc = crfile.crdoc
+        # CREC-YYYY-MM-DD
+        day = crdoc["id"][:15]
+        if day != self.day:
+            self.load_day()
+            self.day = day
+        self.day_docs.append(crdoc)
+
+    def close(self):
+        self.load_day()
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        # a day cut short by an error is not loaded
+        if exc_type is None:
+            self.close()
+        else:
+            self.connection.close()
+
+    def __init__(self, db_path):
+        """
+        db_path : The database file. It is created, along with its
+                  tables, if it doesn't exist.
+        """
+        if os.path.dirname(db_path):
+            os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self.db_path = db_path
+        self.connection = sqlite3.connect(db_path)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript(self.schema)
+        self.day = None
+        self.day_docs = []
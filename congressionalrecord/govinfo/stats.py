@@ -0,0 +1,174 @@
+"""
+Opt-in timers and counters for a run of the downloader and parser.
+
+Nothing is collected until enable() is called. Until then each hook
+costs one global lookup. After it, the hooks in ParseCRFile,
+downloadRequest and GovInfoExtract add to the RunStats that enable()
+returns:
+
+    bytes_downloaded   bytes of zip package received
+    downloads          download requests, by outcome (ok, 404, failed)
+    days               days handled by GovInfoExtract, by status
+    granules_parsed    granules ParseCRFile finished
+    items              content items parsed, by kind
+    parse_cache        parse cache lookups, by result (hit, miss)
+    stage_seconds      seconds spent in each stage, by stage
+    stage_calls        calls to each stage, by stage
+
+Stage times are inclusive: GovInfoExtract's time includes the
+downloadRequest inside it. Granules parsed in worker processes are
+counted in the worker and merged into the parent's RunStats.
+
+    collector = stats.enable()
+    ... run the downloader ...
+    collector.write_prometheus("cr.prom")
+"""
+
+from __future__ import absolute_import
+
+import functools
+import json
+import os
+import tempfile
+import threading
+import time
+
+_collector = None
+
+
+class RunStats(object):
+    """
+    Totals for one run. Each counter is a number, or for the labelled
+    ones a dict of numbers by label. Safe to add to from several
+    threads.
+    """
+
+    prefix = "congressionalrecord_"
+    # counter: (label name or None, help)
+    counters = {
+        "bytes_downloaded": (None, "Bytes of zip package received."),
+        "downloads": ("outcome", "Download requests by outcome."),
+        "days": ("status", "Days handled by GovInfoExtract, by status."),
+        "granules_parsed": (None, "Granules parsed."),
+        "items": ("kind", "Content items parsed, by kind."),
+        "parse_cache": ("result", "Parse cache lookups, by result."),
+        "stage_seconds": ("stage", "Seconds spent in each stage."),
+        "stage_calls": ("stage", "Calls to each stage."),
+    }
+
+    def count(self, name, value=1, label=None):
+        with self.lock:
+            if label is None:
+                self.totals[name] = self.totals.get(name, 0) + value
+            else:
+                by_label = self.totals.setdefault(name, {})
+                by_label[label] = by_label.get(label, 0) + value
+
+    def add_time(self, stage, seconds):
+        with self.lock:
+            for name, value in [("stage_seconds", seconds), ("stage_calls", 1)]:
+                by_label = self.totals.setdefault(name, {})
+                by_label[stage] = by_label.get(stage, 0) + value
+
+    def count_items(self, content):
+        kinds = {}
+        for item in content:
+            kinds[item["kind"]] = kinds.get(item["kind"], 0) + 1
+        for kind, value in kinds.items():
+            self.count("items", value, kind)
+
+    def merge(self, totals):
+        """Add the totals of another run, as given by as_dict()."""
+        for name, value in totals.items():
+            if isinstance(value, dict):
+                for label, labelled in value.items():
+                    self.count(name, labelled, label)
+            else:
+                self.count(name, value)
+
+    def as_dict(self):
+        with self.lock:
+            return {
+                name: dict(value) if isinstance(value, dict) else value
+                for name, value in self.totals.items()
+            }
+
+    def prometheus(self):
+        """The totals in the Prometheus text exposition format."""
+        lines = []
+        for name, value in sorted(self.as_dict().items()):
+            label_name, help_text = self.counters.get(name, (None, name))
+            metric = self.prefix + name + "_total"
+            lines.append("# HELP {} {}".format(metric, help_text))
+            lines.append("# TYPE {} counter".format(metric))
+            if isinstance(value, dict):
+                for label, labelled in sorted(value.items()):
+                    lines.append(
+                        '{}{{{}="{}"}} {}'.format(
+                            metric, label_name or "label", label, labelled
+                        )
+                    )
+            else:
+                lines.append("{} {}".format(metric, value))
+        return "\n".join(lines) + "\n"
+
+    def write_atomic(self, path, text):
+        # a textfile collector must never read half a file
+        tmp_fd, tmp_path = tempfile.mkstemp(
+            prefix=os.path.basename(path) + ".",
+            suffix=".part",
+            dir=os.path.dirname(path) or ".",
+        )
+        with os.fdopen(tmp_fd, "w") as out_file:
+            out_file.write(text)
+        os.replace(tmp_path, path)
+
+    def write_prometheus(self, path):
+        """Write a node_exporter textfile (path should end in .prom)."""
+        self.write_atomic(path, self.prometheus())
+
+    def write_json(self, path):
+        self.write_atomic(path, json.dumps(self.as_dict(), indent=1, sort_keys=True))
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.totals = {}
+
+
+def enable(collector=None):
+    """Start collecting, into collector or a new RunStats, and return it."""
+    global _collector
+    _collector = collector if collector is not None else RunStats()
+    return _collector
+
+
+def disable():
+    """Stop collecting. Returns the RunStats that was collecting, if any."""
+    global _collector
+    collector, _collector = _collector, None
+    return collector
+
+
+def current():
+    """The RunStats collecting now, or None."""
+    return _collector
+
+
+def timed(stage):
+    """Decorator: add each call's duration to stage while enabled."""
+
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            collector = _collector
+            if collector is None:
+                return fn(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                collector.add_time(stage, time.perf_counter() - start)
+
+        return wrapper
+
+    return decorate
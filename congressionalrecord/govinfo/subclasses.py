@@ -1,5 +1,118 @@
 import logging
 import re
+import sys
+from collections.abc import Mapping
+
+
+class _Unset(object):
+    """Marks a ContentItem field that was never set."""
+
+    __slots__ = ()
+
+    def __reduce__(self):
+        # unpickles as the module's unset, so identity checks still work
+        return "unset"
+
+    def __repr__(self):
+        return "unset"
+
+
+unset = _Unset()
+
+
+class ContentItem(Mapping):
+    """
+    One content item of a crdoc. A day holds tens of thousands of these,
+    so the fields every item has live in slots rather than a dict, kind
+    and speaker strings are interned, and the handful of kind-specific
+    fields (prayer_name, committees, ...) go in a dict only for the items
+    that have them.
+
+    It reads like the dict it replaces, keys in the same order, and
+    to_dict() gives that dict for serializing.
+
+    An item parsed in spans mode has no text of its own. It keeps source,
+    the granule's whole text, and spans, the [start, end) offsets of its
+    runs of lines in source; its text is built from them when asked for.
+    """
+
+    __slots__ = (
+        "kind",
+        "speaker",
+        "text",
+        "turn",
+        "spans",
+        "speaker_bioguide",
+        "itemno",
+        "source",
+        "extra",
+    )
+    fields = __slots__[:-2]
+    interned = ("kind", "speaker")
+
+    def span_text(self):
+        """The item's text, joined from its spans of source."""
+        return "\n".join(self.source[start:end] for start, end in self.spans)
+
+    def __getitem__(self, key):
+        if key in self.fields:
+            value = getattr(self, key)
+            if key == "text" and value is None and self.spans is not unset:
+                return self.span_text()
+            if value is not unset:
+                return value
+        elif self.extra is not None and key in self.extra:
+            return self.extra[key]
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        if key in self.fields:
+            if key in self.interned and isinstance(value, str):
+                value = sys.intern(value)
+            setattr(self, key, value)
+        else:
+            if self.extra is None:
+                self.extra = {}
+            self.extra[key] = value
+
+    def __iter__(self):
+        # speaker_bioguide and the extras come before itemno, as they
+        # did when items were dicts, and spans go in after turn
+        for key in self.fields[:-1]:
+            if getattr(self, key) is not unset:
+                yield key
+        if self.extra is not None:
+            yield from self.extra
+        if self.itemno is not unset:
+            yield "itemno"
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __repr__(self):
+        return "ContentItem({!r})".format(self.to_dict())
+
+    def to_dict(self):
+        return {key: self[key] for key in self}
+
+    @classmethod
+    def from_dict(cls, item_dict):
+        """The ContentItem for a dict that to_dict() made."""
+        item = cls()
+        for key, value in item_dict.items():
+            item[key] = value
+        return item
+
+    def __init__(self, kind="Unknown", speaker="Unknown", text=None, turn=-1):
+        self["kind"] = kind
+        self["speaker"] = speaker
+        self.text = text
+        self.turn = turn
+        self.spans = unset
+        self.speaker_bioguide = unset
+        self.itemno = unset
+        self.source = None
+        self.extra = None
 
 
 class crItem(object):
@@ -190,33 +303,25 @@ class crItem(object):
         if parent.lines_remaining == False:
             logging.info("Reached end of document.")
             return
-        item_types = parent.item_types
+        classify = parent.classifier.classify
         content = [parent.cur_line]
+        if parent.spans:
+            # [start, end) of each run of lines in parent.pre_text; a
+            # skipped line ends a run
+            start = parent.cur_offset
+            spans = [[start, start + len(parent.cur_line)]]
+        else:
+            spans = None
         # What is this line
-        for kind, params in list(item_types.items()):
-            for pat in params["patterns"]:
-                amatch = re.match(pat, parent.cur_line)
-                if amatch:
-                    self.item["kind"] = kind
-                    # if params['special_case']:
-                    #    self.item['flag'] = params['condition']
-                    # else:
-                    #    self.item['flag'] = False
-                    if params["speaker_re"]:
-                        them = amatch.group(params["speaker_group"])
-                        self.item["speaker"] = them
-                        if them in list(self.parent.speakers.keys()):
-                            self.item["speaker_bioguide"] = self.parent.speakers[them][
-                                "bioguideid"
-                            ]
-                        else:
-                            self.item["speaker_bioguide"] = None
-                    else:
-                        self.item["speaker"] = params["speaker"]
-                        self.item["speaker_bioguide"] = None
-                    break
-            if amatch:
-                break
+        line_class = classify(parent.cur_line)
+        if line_class.kind is not None:
+            self.item["kind"] = line_class.kind
+            self.item["speaker"] = line_class.speaker
+            them = line_class.speaker
+            if line_class.params["speaker_re"] and them in parent.speakers:
+                self.item["speaker_bioguide"] = parent.speakers[them]["bioguideid"]
+            else:
+                self.item["speaker_bioguide"] = None
         # OK so now put everything else in with it
         # that doesn't interrupt an item
         # conditional logic for edge cases goes here.
@@ -224,19 +329,29 @@ class crItem(object):
         #    pass
         # else:
         for line in parent.the_text:
-            if self.is_break(line):
+            line_class = classify(line)
+            if line_class.breaks:
                 break
-            elif self.is_skip(line):
+            elif line_class.skips:
                 pass
+            elif spans is not None:
+                start = parent.cur_offset
+                if start == spans[-1][1] + 1:
+                    spans[-1][1] = start + len(line)
+                else:
+                    spans.append([start, start + len(line)])
             else:
                 content.append(line)
-        # The original text was split on newline, so ...
-        item_text = "\n".join(content)
-        self.item["text"] = item_text
+        if spans is not None:
+            self.item.source = parent.pre_text
+            self.item["spans"] = spans
+        else:
+            # The original text was split on newline, so ...
+            self.item["text"] = "\n".join(content)
 
         # Extract constitutional authority information if applicable
         if self.item["kind"] == "constitutional_authority":
-            article, section, clause, bill_number = self.extract_constitutional_authority(item_text)
+            article, section, clause, bill_number = self.extract_constitutional_authority(self.item["text"])
             if article:
                 self.item["constitutional_authority_article"] = article
             if section:
@@ -248,7 +363,7 @@ class crItem(object):
 
         # Extract prayer information if applicable
         if self.item["kind"] == "prayer":
-            prayer_name, prayer_title = self.extract_prayer_info(item_text)
+            prayer_name, prayer_title = self.extract_prayer_info(self.item["text"])
             if prayer_name:
                 self.item["prayer_name"] = prayer_name
             if prayer_title:
@@ -256,7 +371,7 @@ class crItem(object):
 
         # Extract committee election information if applicable
         if self.item["kind"] == "committee_election":
-            committees = self.extract_committee_election_info(item_text)
+            committees = self.extract_committee_election_info(self.item["text"])
             if committees:
                 self.item["committees"] = committees
             # Fix speaker name to include "The"
@@ -265,7 +380,7 @@ class crItem(object):
 
         # Extract committee resignation information if applicable
         if self.item["kind"] == "committee_resignation":
-            committee, member, state = self.extract_committee_resignation_info(item_text)
+            committee, member, state = self.extract_committee_resignation_info(self.item["text"])
             if committee:
                 self.item["committee"] = committee
             if member:
@@ -276,7 +391,7 @@ class crItem(object):
                 self.item["state"] = state
 
     def __init__(self, parent):
-        self.item = {"kind": "Unknown", "speaker": "Unknown", "text": None, "turn": -1}
+        self.item = ContentItem()
 
         self.parent = parent
         self.item_builder()
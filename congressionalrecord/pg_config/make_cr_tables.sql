@@ -1,6 +1,6 @@
 DROP TABLE IF EXISTS cr_pages CASCADE;
 CREATE TABLE cr_pages (
-       pageid varchar(35) PRIMARY KEY,
+       pageid varchar(64) PRIMARY KEY,
        title text,
        chamber varchar(21),
        extension boolean,
@@ -18,14 +18,14 @@ CREATE TABLE cr_bills (
        context varchar(50),
        bill_type varchar(7),
        bill_no smallint,
-       pageid varchar(35) REFERENCES cr_pages(pageid));
+       pageid varchar(64) REFERENCES cr_pages(pageid));
 
 DROP TABLE IF EXISTS cr_speech;
 CREATE TABLE cr_speech (
-       speechid varchar(50) PRIMARY KEY,
+       speechid varchar(72) PRIMARY KEY,
        speaker varchar(100),
        speaker_bioguide varchar(7) REFERENCES leg_bio(bioguideid),
-       pageid varchar(35) REFERENCES cr_pages(pageid),
+       pageid varchar(64) REFERENCES cr_pages(pageid),
        text text,
        turn smallint NOT NULL);
        
@@ -0,0 +1,167 @@
+"""
+Stream parsed granules straight into Postgres with COPY ... FROM STDIN.
+
+This is the direct alternative to crToPG's flatfiles. Text goes in
+whole, with no delimiter stripping, because values are escaped for
+COPY's text format rather than joined with a delimiter nobody escapes.
+"""
+
+import logging
+import re
+
+import psycopg2 as pg
+
+from ..govinfo.downloader import Downloader as dl
+from .pg_cr_bulkwrite import bill_rows, page_row, speech_rows
+
+# COPY text format: backslash escapes for the delimiter (tab), newlines
+# and backslash itself. Postgres text can't hold NUL, so it is dropped.
+copy_escapes = {"\\": "\\\\", "\t": "\\t", "\n": "\\n", "\r": "\\r", "\x00": ""}
+re_copy_special = re.compile(r"[\\\t\n\r\x00]")
+
+
+def copy_text_value(value):
+    """One value in COPY text format."""
+    if value is None:
+        return "\\N"
+    if value is True:
+        return "t"
+    if value is False:
+        return "f"
+    return re_copy_special.sub(lambda m: copy_escapes[m.group(0)], str(value))
+
+
+def copy_text_line(row):
+    """A row (a sequence of values) as one line of COPY text format."""
+    return "\t".join(copy_text_value(value) for value in row) + "\n"
+
+
+class CopyStream(object):
+    """
+    A read-only file object over an iterator of rows, for
+    cursor.copy_expert. Lines are encoded as they are read, so a table's
+    rows never have to be joined into one big string.
+    """
+
+    def read(self, size=-1):
+        while size < 0 or len(self.buffer) < size:
+            try:
+                self.buffer += copy_text_line(next(self.rows)).encode("utf-8")
+            except StopIteration:
+                break
+        if size < 0:
+            size = len(self.buffer)
+        chunk, self.buffer = self.buffer[:size], self.buffer[size:]
+        return chunk
+
+    def readline(self, size=-1):
+        return self.read(size)
+
+    def __init__(self, rows):
+        self.rows = iter(rows)
+        self.buffer = b""
+
+
+class PGCopySink(object):
+    """
+    Load granules into cr_pages, cr_bills and cr_speech (see
+    pg_config/make_cr_tables.sql) one day at a time. Each day is one
+    transaction: its old rows, if any, are deleted, then the day's rows
+    are streamed in with COPY. A rerun of a day replaces it, and a day
+    that fails leaves the tables as they were.
+    """
+
+    # parents first
+    tables = ["cr_pages", "cr_bills", "cr_speech"]
+
+    def copy_day(self):
+        if not self.day_docs:
+            return
+        day_prefix = self.day + "-%"
+        rows = {table: [] for table in self.tables}
+        for crdoc in self.day_docs:
+            if not crdoc["header"]:
+                logging.warning("{} has no header, skipping.".format(crdoc["id"]))
+                continue
+            # COPY escaping keeps the text intact, so no rd() here
+            rows["cr_pages"].append(page_row(crdoc, clean=str))
+            rows["cr_bills"].extend(bill_rows(crdoc))
+            rows["cr_speech"].extend(speech_rows(crdoc, clean=str))
+        try:
+            with self.connection.cursor() as cursor:
+                # children first, so foreign keys hold
+                for table in reversed(self.tables):
+                    cursor.execute(
+                        "DELETE FROM {} WHERE pageid LIKE %s".format(table),
+                        (day_prefix,),
+                    )
+                for table in self.tables:
+                    if not rows[table]:
+                        continue
+                    columns = ", ".join(rows[table][0].keys())
+                    cursor.copy_expert(
+                        "COPY {} ({}) FROM STDIN".format(table, columns),
+                        CopyStream(list(row.values()) for row in rows[table]),
+                        size=self.chunk_size,
+                    )
+            self.connection.commit()
+        except pg.Error:
+            self.connection.rollback()
+            raise
+        logging.info(
+            "Copied {}: {} pages, {} bills, {} speeches".format(
+                self.day,
+                len(rows["cr_pages"]),
+                len(rows["cr_bills"]),
+                len(rows["cr_speech"]),
+            )
+        )
+        self.day_docs = []
+
+    def write(self, crfile):
+        crdoc = crfile.crdoc
+        # CREC-YYYY-MM-DD
+        day = crdoc["id"][:15]
+        if day != self.day:
+            self.copy_day()
+            self.day = day
+        self.day_docs.append(crdoc)
+
+    def close(self):
+        self.copy_day()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        # a day cut short by an error is not loaded
+        if exc_type is None:
+            self.close()
+
+    def __init__(self, connection, chunk_size=2**16):
+        """
+        connection : An open psycopg2 connection.
+        chunk_size : Bytes handed to COPY at a time.
+        """
+        self.connection = connection
+        self.chunk_size = chunk_size
+        self.day = None
+        self.day_docs = []
+
+
+class crCopyToPG(object):
+    def __init__(self, start, dsn, **kwargs):
+        """
+        Like crToPG, but load straight into the database at dsn (a
+        libpq connection string) with PGCopySink, with no flatfiles.
+        The cr_ tables must already exist.
+        """
+        kwargs["do_mode"] = "yield"
+        self.downloader = dl(start, **kwargs)
+        connection = pg.connect(dsn)
+        try:
+            with PGCopySink(connection) as sink:
+                for crfile in self.downloader.yielded:
+                    sink.write(crfile)
+        finally:
+            connection.close()
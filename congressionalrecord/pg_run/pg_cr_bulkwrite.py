@@ -1,5 +1,6 @@
 import logging
 import os
+import time
 from collections import OrderedDict
 
 import unicodecsv as csv
@@ -21,28 +22,135 @@ def rd(astring, delimiter="|"):
 
 
 class outStack(object):
+    """
+    Buffered writer for one table's rows.
+
+    Rows collect in memory until there are max_rows of them or roughly
+    max_bytes of values, then go to the file in one writerows call
+    through a single buffered handle. close() (or leaving a with block)
+    writes what is left, closes the file and logs the rows per second.
+    """
+
     def add(self, a_page):
         self.stack.append(a_page)
+        self.stack_bytes += self.row_bytes(a_page)
+        if len(self.stack) >= self.max_rows or self.stack_bytes >= self.max_bytes:
+            self.write()
+
+    def row_bytes(self, row):
+        # cheap estimate; only used to bound the buffer
+        return sum(len(value) for value in row.values() if isinstance(value, str))
 
     def write(self):
-        while self.stack:
-            row = self.stack.pop(0)
-            self.writer.writerow(row)
+        """Write out the buffered rows."""
+        if self.stack:
+            self.writer.writerows(self.stack)
+            self.rows_written += len(self.stack)
+            self.stack = []
+            self.stack_bytes = 0
+
+    def rows_per_sec(self):
+        elapsed = time.perf_counter() - self.started
+        return self.rows_written / elapsed if elapsed > 0 else 0.0
+
+    def close(self):
+        if self.outfile.closed:
+            return
+        self.write()
+        self.outfile.close()
+        logging.info(
+            "Wrote {} rows to {} ({:.0f} rows/sec)".format(
+                self.rows_written, self.outpath, self.rows_per_sec()
+            )
+        )
+
+    def __enter__(self):
+        return self
 
-    def __init__(self, outpath, fieldnames):
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __init__(
+        self, outpath, fieldnames, max_rows=10000, max_bytes=2**23, buffering=2**20
+    ):
         """
-        Stack object for managing rows.
         Args:
             outpath : File path string
             fieldnames : list of field names in order
+            max_rows : rows to buffer before writing
+            max_bytes : roughly how much text to buffer before writing
+            buffering : size of the file handle's buffer, in bytes
         """
-        self.outfile = open(outpath, "ab")
+        self.outpath = outpath
+        self.outfile = open(outpath, "ab", buffering=buffering)
         self.stack = []
+        self.stack_bytes = 0
+        self.max_rows = max_rows
+        self.max_bytes = max_bytes
+        self.rows_written = 0
+        self.started = time.perf_counter()
         self.writer = csv.DictWriter(
             self.outfile, fieldnames=fieldnames, delimiter="|", encoding="utf-8"
         )
 
 
+def page_row(crfile, clean=rd):
+    """The cr_pages row for a crdoc."""
+    return OrderedDict(
+        [
+            ("pageid", crfile["id"]),
+            ("title", clean(crfile["doc_title"])),
+            ("chamber", crfile["header"]["chamber"]),
+            ("extension", crfile["header"]["extension"]),
+            ("cr_day", crfile["header"]["day"]),
+            ("cr_month", crfile["header"]["month"]),
+            ("cr_year", crfile["header"]["year"]),
+            ("num", crfile["header"]["num"]),
+            ("vol", crfile["header"]["vol"]),
+            ("pages", crfile["header"]["pages"]),
+            ("wkday", crfile["header"]["wkday"]),
+        ]
+    )
+
+
+def bill_rows(crfile):
+    """The cr_bills rows for a crdoc."""
+    bills = []
+    if "related_bills" in list(crfile.keys()):
+        for bill in crfile["related_bills"]:
+            bill_row = OrderedDict(
+                [
+                    ("congress", bill["congress"]),
+                    ("context", bill["context"]),
+                    ("bill_type", bill["type"]),
+                    ("bill_no", bill["number"]),
+                    ("pageid", crfile["id"]),
+                ]
+            )
+            bills.append(bill_row)
+    return bills
+
+
+def speech_rows(crfile, clean=rd):
+    """The cr_speech rows for a crdoc."""
+    speeches = []
+    for speech in crfile["content"]:
+        if speech["kind"] == "speech":
+            speechid = crfile["id"] + "-" + str(speech["turn"])
+            speech_row = OrderedDict(
+                [
+                    ("speechid", speechid),
+                    ("speaker", speech["speaker"]),
+                    ("speaker_bioguide", speech["speaker_bioguide"]),
+                    ("pageid", crfile["id"]),
+                    ("text", clean(speech["text"])),
+                    ("turn", speech["turn"]),
+                ]
+            )
+            speeches.append(speech_row)
+    return speeches
+
+
 class crToPG(object):
     def ingest(self, crfile, pagestack, billstack, speechstack):
         """
@@ -50,59 +158,15 @@ class crToPG(object):
         Pass the appropriate rows for each part
         to the right stack for a bulk insert.
         """
-        page_row = OrderedDict(
-            [
-                ("pageid", crfile["id"]),
-                ("title", rd(crfile["doc_title"])),
-                ("chamber", crfile["header"]["chamber"]),
-                ("extension", crfile["header"]["extension"]),
-                ("cr_day", crfile["header"]["day"]),
-                ("cr_month", crfile["header"]["month"]),
-                ("cr_year", crfile["header"]["year"]),
-                ("num", crfile["header"]["num"]),
-                ("vol", crfile["header"]["vol"]),
-                ("pages", crfile["header"]["pages"]),
-                ("wkday", crfile["header"]["wkday"]),
-            ]
-        )
         # Add the "page" level to the page stack first
-        pagestack.add(page_row)
-
-        bills = []
-        if "related_bills" in list(crfile.keys()):
-            for bill in crfile["related_bills"]:
-                bill_row = OrderedDict(
-                    [
-                        ("congress", bill["congress"]),
-                        ("context", bill["context"]),
-                        ("bill_type", bill["type"]),
-                        ("bill_no", bill["number"]),
-                        ("pageid", crfile["id"]),
-                    ]
-                )
-                bills.append(bill_row)
+        pagestack.add(page_row(crfile))
 
         # Bills for the bill god!
-        billstack.add(bills)
-
-        speeches = []
-        for speech in crfile["content"]:
-            if speech["kind"] == "speech":
-                speechid = crfile["id"] + "-" + str(speech["turn"])
-                speech_row = OrderedDict(
-                    [
-                        ("speechid", speechid),
-                        ("speaker", speech["speaker"]),
-                        ("speaker_bioguide", speech["speaker_bioguide"]),
-                        ("pageid", crfile["id"]),
-                        ("text", rd(speech["text"])),
-                        ("turn", speech["turn"]),
-                    ]
-                )  # Gotta get rid of delimiter char
-                speeches.append(speech_row)
+        billstack.add(bill_rows(crfile))
 
         # SPEECHES FOR THE SPEECH THRONE
-        speechstack.add(speeches)
+        # (rd gets rid of the delimiter char)
+        speechstack.add(speech_rows(crfile))
 
     def __init__(self, start, **kwargs):
         """
@@ -152,15 +216,14 @@ class crToPG(object):
             "text",
             "turn",
         ]
-        pagestack = crPages(pagepath, self.page_fields)
-        billstack = crBills(billpath, self.bill_fields)
-        speechstack = crSpeeches(speechpath, self.speech_fields)
-        for crfile in self.downloader.yielded:
-            doc = crfile.crdoc
-            self.ingest(doc, pagestack, billstack, speechstack)
-            pagestack.write()
-            billstack.write()
-            speechstack.write()
+        with (
+            crPages(pagepath, self.page_fields) as pagestack,
+            crBills(billpath, self.bill_fields) as billstack,
+            crSpeeches(speechpath, self.speech_fields) as speechstack,
+        ):
+            for crfile in self.downloader.yielded:
+                doc = crfile.crdoc
+                self.ingest(doc, pagestack, billstack, speechstack)
 
 
 class crPages(outStack):
@@ -169,7 +232,8 @@ class crPages(outStack):
 
 class crBills(outStack):
     def add(self, some_bills):
-        self.stack.extend(some_bills)
+        for bill in some_bills:
+            outStack.add(self, bill)
 
 
 class crSpeeches(crBills):
@@ -0,0 +1,59 @@
+#!/usr/bin/env python
+"""
+Time pulling the <pre> text out of each granule, BeautifulSoup vs.
+the extract_pre fast path that ParseCRFile.read_htm_file tries first.
+
+Usage:
+    python dev_scripts/bench_read_htm.py [day directory] [repeats]
+
+The day directory defaults to the bundled fixture day,
+tests/test_files/CREC-2005-07-20.
+"""
+
+import os
+import sys
+import timeit
+
+from bs4 import BeautifulSoup
+
+from congressionalrecord.govinfo.cr_parser import extract_pre
+
+
+def main():
+    day_dir = sys.argv[1] if len(sys.argv) > 1 else "tests/test_files/CREC-2005-07-20"
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    html_dir = os.path.join(day_dir, "html")
+    granules = sorted(os.listdir(html_dir))
+
+    soup_total = fast_total = 0.0
+    fallbacks = 0
+    for name in granules:
+        with open(os.path.join(html_dir, name), "r") as htm_file:
+            htm_text = htm_file.read()
+        soup_time = min(
+            timeit.repeat(
+                lambda: BeautifulSoup(htm_text, "lxml").pre.text,
+                number=1,
+                repeat=repeats,
+            )
+        )
+        fast_time = min(
+            timeit.repeat(lambda: extract_pre(htm_text), number=1, repeat=repeats)
+        )
+        if extract_pre(htm_text) is None:
+            # read_htm_file pays for both when the fast path gives up
+            fallbacks += 1
+            fast_time += soup_time
+        soup_total += soup_time
+        fast_total += fast_time
+
+    count = len(granules)
+    print("granules:           {}".format(count))
+    print("soup fallbacks:     {}".format(fallbacks))
+    print("soup, per granule:  {:8.1f} us".format(soup_total / count * 1e6))
+    print("fast, per granule:  {:8.1f} us".format(fast_total / count * 1e6))
+    print("speedup:            {:8.1f}x".format(soup_total / fast_total))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,232 @@
+#!/usr/bin/env python
+"""
+Time each stage of parsing a day of the Record and compare the result
+against a stored baseline.
+
+The stages, as ParseCRDir and ParseCRFile run them:
+
+    mods       ParseCRDir loading and indexing mods.xml
+    metadata   ParseCRFile.gen_file_metadata and the line classifier
+    read       read_htm_file, up to and including the header
+    classify   write_page, crItem building and line classification
+    serialize  turning the crdoc into JSON with the default backend
+    total      a whole ParseCRFile, start to finish
+
+Each pass parses every granule the downloader would, then runs each
+stage again on the parsed granule. A stage's time is its best pass.
+Peak RSS is that of the whole run, so it grows with the passes.
+
+Usage:
+    python dev_scripts/bench_stages.py [--day DIR] [--passes N]
+        [--baseline FILE] [--threshold RATIO] [--save-baseline]
+
+The day defaults to the bundled fixture day, and the baseline to
+dev_scripts/bench_baseline.json. The script exits with status 1 if any
+stage is more than threshold times slower than the baseline, or peak
+RSS more than threshold times bigger. Baselines are only comparable on
+the machine they were saved on; save a new one before changing the
+parser.
+"""
+
+import argparse
+import json
+import logging
+import os
+import platform
+import resource
+import sys
+import time
+
+from congressionalrecord.govinfo.cr_parser import ParseCRDir, ParseCRFile
+from congressionalrecord.govinfo.downloader import day_granules
+from congressionalrecord.govinfo.serialization import get_backend
+
+stages = ["mods", "metadata", "read", "classify", "serialize", "total"]
+# stages that see every line of a granule
+line_stages = ["read", "classify", "total"]
+
+
+def timed(fn):
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def run_pass(day_dir, serializer):
+    """One pass over the day: seconds per stage, granules and lines."""
+    seconds = dict.fromkeys(stages, 0.0)
+    # one load is too short to time on its own
+    seconds["mods"] = min(timed(lambda: ParseCRDir(day_dir)) for _ in range(5))
+    crdir = ParseCRDir(day_dir)
+    granules = day_granules(crdir)
+    lines = 0
+    for parse_path in granules:
+        start = time.perf_counter()
+        crfile = ParseCRFile(parse_path, crdir)
+        seconds["total"] += time.perf_counter() - start
+        lines += crfile.pre_text.count("\n") + 1
+
+        def metadata():
+            crfile.gen_file_metadata()
+            crfile.classifier = crfile.make_classifier()
+
+        def read():
+            crfile.the_text = crfile.read_htm_file()
+            crfile.write_header()
+
+        def classify():
+            crfile.write_page()
+            crfile.extract_committee_data_from_content()
+
+        seconds["metadata"] += timed(metadata)
+        seconds["read"] += timed(read)
+        seconds["classify"] += timed(classify)
+        seconds["serialize"] += timed(lambda: serializer.dumps(crfile.crdoc))
+    crdir.close()
+    return seconds, len(granules), lines
+
+
+def peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    if sys.platform == "darwin":
+        peak /= 1024
+    return peak / 1024
+
+
+def measure(day_dir, passes):
+    serializer = get_backend()
+    best = None
+    for _ in range(passes):
+        seconds, granules, lines = run_pass(day_dir, serializer)
+        if best is None:
+            best = seconds
+        else:
+            best = {stage: min(best[stage], seconds[stage]) for stage in stages}
+    return {
+        "day": os.path.basename(os.path.normpath(day_dir)),
+        "granules": granules,
+        "lines": lines,
+        "passes": passes,
+        "json_backend": serializer.name,
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "seconds": best,
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+    }
+
+
+def report(result, baseline, threshold):
+    """Print the result next to the baseline. Returns the regressions."""
+    regressions = []
+    print(
+        "{} granules, {} lines, {} backend".format(
+            result["granules"], result["lines"], result["json_backend"]
+        )
+    )
+    print(
+        "{:<10} {:>9} {:>12} {:>12} {:>9}".format(
+            "stage", "seconds", "granules/s", "lines/s", "baseline"
+        )
+    )
+    for stage in stages:
+        seconds = result["seconds"][stage]
+        rate = "{:.1f}".format(result["granules"] / seconds)
+        line_rate = ""
+        if stage in line_stages:
+            line_rate = "{:.0f}".format(result["lines"] / seconds)
+        versus = ""
+        if baseline is not None:
+            ratio = seconds / baseline["seconds"][stage]
+            versus = "{:.2f}x".format(ratio)
+            if ratio > threshold:
+                regressions.append(stage)
+                versus += " !"
+        print(
+            "{:<10} {:>9.3f} {:>12} {:>12} {:>9}".format(
+                stage, seconds, rate if stage != "mods" else "", line_rate, versus
+            )
+        )
+    versus = ""
+    if baseline is not None:
+        ratio = result["peak_rss_mb"] / baseline["peak_rss_mb"]
+        versus = "{:.2f}x".format(ratio)
+        if ratio > threshold:
+            regressions.append("peak_rss_mb")
+            versus += " !"
+    print(
+        "{:<10} {:>9} {:>12} {:>12} {:>9}".format(
+            "peak RSS", "{:.1f} MB".format(result["peak_rss_mb"]), "", "", versus
+        )
+    )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the parser's stages.")
+    parser.add_argument(
+        "--day", default="tests/test_files/CREC-2005-07-20", help="Day directory."
+    )
+    parser.add_argument("--passes", type=int, default=3, help="Passes to run.")
+    parser.add_argument(
+        "--baseline",
+        default=os.path.join(os.path.dirname(__file__), "bench_baseline.json"),
+        help="Baseline file to compare against or save to.",
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=1.5,
+        help="Slowdown (or growth, for peak RSS) that counts as a regression.",
+    )
+    parser.add_argument(
+        "--save-baseline",
+        action="store_true",
+        help="Save this run as the baseline instead of comparing.",
+    )
+    args = parser.parse_args()
+    # the parser logs a lot at INFO; keep it off the report
+    logging.basicConfig(level=logging.ERROR)
+
+    result = measure(args.day, args.passes)
+    if args.save_baseline:
+        report(result, None, args.threshold)
+        with open(args.baseline, "w") as out_json:
+            json.dump(result, out_json, indent=1, sort_keys=True)
+            out_json.write("\n")
+        print("Saved baseline to {}".format(args.baseline))
+        return 0
+
+    baseline = None
+    if os.path.exists(args.baseline):
+        with open(args.baseline, "r") as in_json:
+            baseline = json.load(in_json)
+        if baseline["day"] != result["day"]:
+            print("Baseline is for {}, not comparing.".format(baseline["day"]))
+            baseline = None
+        elif any(
+            baseline[key] != result[key]
+            for key in ["python", "machine", "passes", "json_backend"]
+        ):
+            print(
+                "Baseline was {} passes with Python {} on {} and {}, "
+                "results may not compare.".format(
+                    baseline["passes"],
+                    baseline["python"],
+                    baseline["machine"],
+                    baseline["json_backend"],
+                )
+            )
+    else:
+        print("No baseline at {}, not comparing.".format(args.baseline))
+    regressions = report(result, baseline, args.threshold)
+    if regressions:
+        print(
+            "Regressed past {:.2f}x: {}".format(args.threshold, ", ".join(regressions))
+        )
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,47 @@
+#!/usr/bin/env python
+"""
+Rank the item_types patterns by how much time LineClassifier spends
+matching them, with attempts and hits for each, over one or more days.
+
+Usage:
+    python dev_scripts/profile_patterns.py [day directory ...] [--width N]
+
+Day directories are extracted days as the downloader leaves them,
+e.g. output/2020/CREC-2020-01-15. The default is the bundled fixture
+day, tests/test_files/CREC-2005-07-20.
+"""
+
+import argparse
+import logging
+
+from congressionalrecord.govinfo.classifier import disable_profiling, enable_profiling
+from congressionalrecord.govinfo.cr_parser import ParseCRDir, ParseCRFile
+from congressionalrecord.govinfo.downloader import day_granules
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Profile the classifier's patterns.")
+    parser.add_argument(
+        "days", nargs="*", default=["tests/test_files/CREC-2005-07-20"]
+    )
+    parser.add_argument(
+        "--width", type=int, default=60, help="Cut patterns to this many characters."
+    )
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.ERROR)
+
+    profile = enable_profiling()
+    granules = 0
+    for day_dir in args.days:
+        crdir = ParseCRDir(day_dir)
+        for parse_path in day_granules(crdir):
+            ParseCRFile(parse_path, crdir)
+            granules += 1
+        crdir.close()
+    disable_profiling()
+    print("{} days, {} granules".format(len(args.days), granules))
+    print(profile.report(args.width))
+
+
+if __name__ == "__main__":
+    main()
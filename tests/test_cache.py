@@ -0,0 +1,74 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from congressionalrecord.govinfo import cr_parser as cr
+from congressionalrecord.govinfo import stats
+from congressionalrecord.govinfo.cache import ParseCache
+from congressionalrecord.govinfo.serialization import get_backend
+
+
+class testParseCache(unittest.TestCase):
+    def setUp(self):
+        self.crdir = cr.ParseCRDir("tests/test_files/CREC-2005-07-20")
+        self.input_path = (
+            "tests/test_files/CREC-2005-07-20/html/CREC-2005-07-20-pt1-PgS8504-2.htm"
+        )
+        self.tmpdir = tempfile.mkdtemp()
+        self.cache = ParseCache(self.tmpdir)
+
+    def tearDown(self):
+        stats.disable()
+        shutil.rmtree(self.tmpdir)
+
+    def test_hit(self):
+        serializer = get_backend()
+        collector = stats.enable()
+        fresh = cr.ParseCRFile(self.input_path, self.crdir, cache=self.cache)
+        cached = cr.ParseCRFile(self.input_path, self.crdir, cache=self.cache)
+        self.assertEqual(collector.as_dict()["parse_cache"], {"miss": 1, "hit": 1})
+        self.assertEqual(collector.as_dict()["granules_parsed"], 1)
+        self.assertFalse(hasattr(cached, "the_text"))
+        self.assertEqual(serializer.dumps(cached.crdoc), serializer.dumps(fresh.crdoc))
+        self.assertEqual(cached.crdoc["content"][0]["kind"], "speech")
+
+    def test_key(self):
+        source_hash = self.crdir.source_hash(self.input_path)
+        other_path = self.input_path.replace("PgS8504-2", "PgS8503-2")
+        key = self.cache.key(source_hash)
+        self.assertEqual(key, self.cache.key(source_hash))
+        self.assertNotEqual(key, self.cache.key(source_hash, spans=True))
+        self.assertNotEqual(key, self.cache.key(self.crdir.source_hash(other_path)))
+
+    def test_spans(self):
+        serializer = get_backend()
+        fresh = cr.ParseCRFile(self.input_path, self.crdir, spans=True)
+        cr.ParseCRFile(self.input_path, self.crdir, spans=True, cache=self.cache)
+        cached = cr.ParseCRFile(
+            self.input_path, self.crdir, spans=True, cache=self.cache
+        )
+        self.assertEqual(serializer.dumps(cached.crdoc), serializer.dumps(fresh.crdoc))
+
+    def test_evict(self):
+        crdoc = {"content": [], "filler": "x" * 1000}
+        for n in range(5):
+            key = self.cache.key(str(n))
+            self.cache.put(key, crdoc)
+            # mtimes a second apart, oldest first
+            os.utime(self.cache.path(key), (n, n))
+        self.assertIsNotNone(self.cache.get(self.cache.key("0")))
+        self.cache.max_bytes = self.cache.size - 1
+        self.cache.evict()
+        self.assertLessEqual(self.cache.size, self.cache.max_bytes * 0.9)
+        # reading key 0 made it the most recently used
+        self.assertIsNotNone(self.cache.get(self.cache.key("0")))
+        self.assertIsNone(self.cache.get(self.cache.key("1")))
+        self.assertIsNotNone(self.cache.get(self.cache.key("4")))
+
+    def test_unreadable(self):
+        key = self.cache.key("broken")
+        os.makedirs(os.path.dirname(self.cache.path(key)))
+        with open(self.cache.path(key), "wb") as broken:
+            broken.write(b"{not json")
+        self.assertIsNone(self.cache.get(key))
@@ -0,0 +1,168 @@
+import logging
+import os
+import re
+import unittest
+
+from bs4 import BeautifulSoup
+
+from congressionalrecord.govinfo import cr_parser as cr
+from congressionalrecord.govinfo import classifier
+from congressionalrecord.govinfo.classifier import (
+    LineClassifier,
+    compile_pattern,
+    disable_profiling,
+    enable_profiling,
+    lead_pattern,
+)
+
+logging.basicConfig(filename="tests.log", level=logging.DEBUG)
+
+
+class testLeadPattern(unittest.TestCase):
+    def test_first_char(self):
+        lead = lead_pattern(r"\[Roll(call)?")
+        self.assertTrue(lead.match("["))
+        self.assertFalse(lead.match(" "))
+
+    def test_first_nonblank_char(self):
+        lead = lead_pattern(r"^\s+(?P<start>(Pending:)|(By M))", skip_blanks=True)
+        self.assertTrue(lead.match("P"))
+        self.assertTrue(lead.match("B"))
+        self.assertFalse(lead.match("T"))
+
+    def test_unbounded(self):
+        self.assertIsNone(lead_pattern(r"(^[\s]+$)", skip_blanks=True))
+        self.assertIsNone(lead_pattern(r".*foo"))
+        self.assertIsNone(lead_pattern(r"(?i)foo"))
+
+
+class testLineClassifier(unittest.TestCase):
+    """
+    The classifier must agree with walking item_types in order with
+    re.match, which is how crItem classified lines before.
+    """
+
+    def setUp(self):
+        input_string = "tests/test_files/CREC-2005-07-20"
+        self.crdir = cr.ParseCRDir(input_string)
+        input_dir = os.path.join(input_string, "html")
+        self.input_paths = [
+            os.path.join(input_dir, name)
+            for name in sorted(os.listdir(input_dir))
+            if "-Pgnull" not in name
+        ]
+
+    def reference(self, crfile, line):
+        kind = speaker = None
+        for k, params in crfile.item_types.items():
+            for pat in params["patterns"]:
+                amatch = re.match(pat, line)
+                if amatch:
+                    kind = k
+                    if params["speaker_re"]:
+                        speaker = amatch.group(params["speaker_group"])
+                    else:
+                        speaker = params["speaker"]
+                    break
+            if kind:
+                break
+        breaks = any(re.match(pat, line) for pat in crfile.item_breakers)
+        skips = not breaks and any(re.match(pat, line) for pat in crfile.skip_items)
+        return kind, speaker, breaks, skips
+
+    def test_matches_reference(self, **kwargs):
+        for input_path in self.input_paths:
+            crfile = cr.ParseCRFile(input_path, self.crdir, **kwargs)
+            with open(input_path, "r") as htm_file:
+                lines = BeautifulSoup(htm_file.read(), "lxml").pre.text.split("\n")
+            for line in lines:
+                got = crfile.classifier.classify(line)
+                self.assertEqual(
+                    (got.kind, got.speaker, got.breaks, got.skips),
+                    self.reference(crfile, line),
+                    msg=line,
+                )
+
+    @unittest.skipIf(classifier.re2 is None, "google-re2 is not installed")
+    def test_re2_matches_reference(self):
+        self.test_matches_reference(regex_engine="re2")
+
+    def test_shared_rule_sets(self):
+        crfile = cr.ParseCRFile(self.input_paths[0], self.crdir)
+        self.assertIs(
+            LineClassifier.from_item_types(
+                crfile.item_types, guarded=crfile.guarded_patterns
+            ),
+            crfile.classifier,
+        )
+
+
+class testPatternProfile(unittest.TestCase):
+    def setUp(self):
+        self.crdir = cr.ParseCRDir("tests/test_files/CREC-2005-07-20")
+        # 24 speeches
+        self.input_path = (
+            "tests/test_files/CREC-2005-07-20/html/CREC-2005-07-20-pt1-PgS8504-2.htm"
+        )
+
+    def tearDown(self):
+        disable_profiling()
+
+    def test_profile(self):
+        unprofiled = cr.ParseCRFile(self.input_path, self.crdir).crdoc
+        profile = enable_profiling()
+        crfile = cr.ParseCRFile(self.input_path, self.crdir)
+        self.assertIs(disable_profiling(), profile)
+        self.assertEqual(crfile.crdoc, unprofiled)
+        rows = profile.ranked()
+        self.assertEqual(
+            [row[4] for row in rows], sorted([row[4] for row in rows], reverse=True)
+        )
+        entries = {(kind, position): row for kind, position, *row in rows}
+        attempts, hits, seconds, pattern = entries["speech", 0]
+        self.assertEqual(pattern, crfile.re_newspeaker)
+        speeches = [
+            item for item in crfile.crdoc["content"] if item["kind"] == "speech"
+        ]
+        # a line that starts an item is classified again as it ends the last
+        self.assertGreaterEqual(hits, len(speeches))
+        self.assertGreater(len(speeches), 0)
+        self.assertGreater(attempts, hits)
+        self.assertGreater(profile.lines, 0)
+        self.assertIn("title[0]", profile.report())
+
+    def test_off(self):
+        profile = enable_profiling()
+        disable_profiling()
+        cr.ParseCRFile(self.input_path, self.crdir)
+        self.assertEqual(profile.lines, 0)
+
+
+class testRegexEngines(unittest.TestCase):
+    def test_guarded(self):
+        guarded = compile_pattern(cr.ParseCRFile.re_allcaps, guarded=True)
+        self.assertIsNot(guarded, compile_pattern(cr.ParseCRFile.re_allcaps))
+        self.assertTrue(guarded.match(" AN ALL CAPS TITLE"))
+        # quadratic in re: minutes at this length, unguarded
+        line = " " + "A" * 100000 + "a"
+        with self.assertLogs(level="WARNING") as logs:
+            self.assertIsNone(guarded.match(line))
+        self.assertIn("100002 character line", logs.output[0])
+
+    @unittest.skipIf(classifier.re2 is None, "google-re2 is not installed")
+    def test_re2_fallback(self):
+        recorder = compile_pattern(cr.ParseCRFile.re_recorderstart, "re2", True)
+        allcaps = compile_pattern(cr.ParseCRFile.re_allcaps, "re2", True)
+        # RE2 has no lookaheads, so re_allcaps stays on re, guarded
+        self.assertIsInstance(allcaps, classifier._GuardedPattern)
+        self.assertIsInstance(recorder, classifier._RE2Pattern)
+        line = "  The legislative clerk read as follows:"
+        self.assertEqual(recorder.match(line).group("start"), line.strip()[:-1])
+        self.assertEqual(
+            recorder.match("  The legislative clerk\u00a0read").group("start"),
+            "The legislative clerk",
+        )
+
+    def test_unknown_engine(self):
+        with self.assertRaises(ValueError):
+            compile_pattern(r"\s+", "pcre")
@@ -1,7 +1,17 @@
+import json
 import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
 import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import BytesIO
+from zipfile import ZipFile
 
 from congressionalrecord.govinfo import downloader as dl
+from congressionalrecord.govinfo import stats
 
 logging.basicConfig(filename="tests.log", level=logging.DEBUG)
 
@@ -18,3 +28,256 @@ class testDownloader(unittest.TestCase):
     def test_handle_empty(self):
         download = dl.Downloader("2017-01-02", do_mode="json")
         self.assertEqual(download.status, "downloadFailure")
+
+
+class testParallelParse(unittest.TestCase):
+    """
+    Parse the fixture day through bulkdownload, which finds it already
+    extracted under outpath/2005.
+    """
+
+    def setUp(self):
+        self.outpath = tempfile.mkdtemp()
+        os.mkdir(os.path.join(self.outpath, "2005"))
+        os.symlink(
+            os.path.abspath("tests/test_files/CREC-2005-07-20"),
+            os.path.join(self.outpath, "2005", "CREC-2005-07-20"),
+        )
+
+    def tearDown(self):
+        shutil.rmtree(self.outpath)
+
+    def parsed(self, jobs):
+        download = dl.Downloader(
+            "2005-07-20", do_mode="yield", outpath=self.outpath, jobs=jobs
+        )
+        return [(crfile.filepath, crfile.crdoc) for crfile in download.yielded]
+
+    def test_incremental(self):
+        day_dir = os.path.join(self.outpath, "2005", "CREC-2005-07-20")
+        shutil.copytree(os.readlink(day_dir), day_dir + ".copy")
+        os.remove(day_dir)
+        os.rename(day_dir + ".copy", day_dir)
+        json_dir = os.path.join(day_dir, "json")
+        shutil.rmtree(json_dir)
+
+        dl.Downloader("2005-07-20", do_mode="json", outpath=self.outpath)
+        self.assertFalse(os.path.exists(os.path.join(day_dir, "manifest.json")))
+        dl.Downloader(
+            "2005-07-20", do_mode="json", outpath=self.outpath, incremental=True
+        )
+        with open(os.path.join(day_dir, "manifest.json")) as manifest_file:
+            manifest = json.load(manifest_file)
+        self.assertEqual(len(manifest), len(os.listdir(json_dir)))
+        written = {
+            name: os.stat(os.path.join(json_dir, name)).st_mtime_ns
+            for name in os.listdir(json_dir)
+        }
+
+        changed = "CREC-2005-07-20-pt1-PgH6176-5"
+        with open(os.path.join(day_dir, "html", changed + ".htm"), "a") as htm_file:
+            htm_file.write("\n")
+        os.remove(os.path.join(json_dir, "CREC-2005-07-20-pt1-PgH6179.json"))
+        dl.Downloader(
+            "2005-07-20", do_mode="json", outpath=self.outpath, incremental=True
+        )
+        rewritten = sorted(
+            name
+            for name in os.listdir(json_dir)
+            if os.stat(os.path.join(json_dir, name)).st_mtime_ns
+            != written.get(name)
+        )
+        self.assertEqual(
+            rewritten, [changed + ".json", "CREC-2005-07-20-pt1-PgH6179.json"]
+        )
+
+    def test_jobs_match_serial(self):
+        serial = self.parsed(1)
+        paths = [path for path, crdoc in serial]
+        self.assertEqual(paths, sorted(paths))
+        self.assertEqual(self.parsed(2), serial)
+
+
+def zip_fixture_day(day):
+    """The fixture day packaged the way GovInfo serves it, as CREC-<day>."""
+    fixture_dir = "tests/test_files/CREC-2005-07-20"
+    package = BytesIO()
+    with ZipFile(package, "w") as the_zip:
+        for dirpath, dirnames, filenames in os.walk(fixture_dir):
+            for filename in filenames:
+                path = os.path.join(dirpath, filename)
+                arcname = os.path.join(
+                    "CREC-" + day, os.path.relpath(path, fixture_dir)
+                )
+                the_zip.write(path, arcname)
+    return package.getvalue()
+
+
+class stubGovInfo(BaseHTTPRequestHandler):
+    """Serve packages from self.server.packages, tracking concurrency."""
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.active += 1
+            server.most_active = max(server.most_active, server.active)
+        try:
+            time.sleep(0.05)
+            body = server.packages.get(self.path.rsplit("/", 1)[-1])
+            if body is None:
+                self.send_error(404)
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", "application/zip")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        finally:
+            with server.lock:
+                server.active -= 1
+
+    def log_message(self, *args):
+        pass
+
+
+class testConcurrentDownload(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), stubGovInfo)
+        cls.server.packages = {
+            "CREC-{}.zip".format(day): zip_fixture_day(day)
+            for day in ["2005-07-20", "2005-07-21", "2005-07-22"]
+        }
+        cls.server.packages["CREC-2005-07-24.zip"] = b"not a zip package"
+        cls.server.lock = threading.Lock()
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.base = dl.GovInfoDL.govinfo_cr_download_base
+        dl.GovInfoDL.govinfo_cr_download_base = "http://127.0.0.1:{}/CREC-".format(
+            cls.server.server_port
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        dl.GovInfoDL.govinfo_cr_download_base = cls.base
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        self.outpath = tempfile.mkdtemp()
+        self.server.active = self.server.most_active = 0
+
+    def tearDown(self):
+        shutil.rmtree(self.outpath)
+
+    def extract(self, **kwargs):
+        kwargs.update(end="2005-07-23", outpath=self.outpath)
+        download = dl.Downloader("2005-07-19", do_mode="yield", **kwargs)
+        return [
+            (day.day, extractor.status)
+            for day, extractor in download.extract_days("2005-07-19", **kwargs)
+        ]
+
+    def test_days_in_order(self):
+        self.assertEqual(
+            self.extract(days_in_flight=3),
+            [
+                (19, "downloadFailure"),
+                (20, "extractedFilesdeletedZip"),
+                (21, "extractedFilesdeletedZip"),
+                (22, "extractedFilesdeletedZip"),
+                (23, "downloadFailure"),
+            ],
+        )
+        self.assertEqual(
+            sorted(os.listdir(os.path.join(self.outpath, "2005"))),
+            ["CREC-2005-07-20", "CREC-2005-07-21", "CREC-2005-07-22"],
+        )
+        self.assertGreater(self.server.most_active, 1)
+
+    def test_per_host_limit(self):
+        self.extract(days_in_flight=3, per_host=1)
+        self.assertEqual(self.server.most_active, 1)
+
+    def test_parse_while_downloading(self):
+        download = dl.Downloader(
+            "2005-07-20",
+            end="2005-07-22",
+            do_mode="yield",
+            outpath=self.outpath,
+            days_in_flight=2,
+        )
+        days = [crfile.filepath.split(os.sep)[-3] for crfile in download.yielded]
+        self.assertEqual(days, sorted(days))
+        self.assertEqual(
+            sorted(set(days)),
+            ["CREC-2005-07-20", "CREC-2005-07-21", "CREC-2005-07-22"],
+        )
+
+    def parsed(self, **kwargs):
+        download = dl.Downloader(
+            "2005-07-20", do_mode="yield", outpath=self.outpath, **kwargs
+        )
+        return [(crfile.filepath, crfile.crdoc) for crfile in download.yielded]
+
+    def test_keep_zip(self):
+        from_zip = self.parsed(keep_zip=True)
+        self.assertEqual(
+            os.listdir(os.path.join(self.outpath, "2005")), ["CREC-2005-07-20.zip"]
+        )
+        self.assertEqual(self.parsed(keep_zip=True, jobs=2), from_zip)
+        shutil.rmtree(os.path.join(self.outpath, "2005"))
+        self.assertEqual(self.parsed(), from_zip)
+
+    def test_iter_documents(self):
+        documents = dl.iter_documents(
+            "2005-07-20", "2005-07-22", outpath=self.outpath, jobs=2
+        )
+        first = next(documents)
+        self.assertIsInstance(first, dl.ParsedGranule)
+        self.assertEqual(first.filepath.split(os.sep)[-3], "CREC-2005-07-20")
+        documents.close()
+        self.assertEqual(
+            os.listdir(os.path.join(self.outpath, "2005")), ["CREC-2005-07-20"]
+        )
+        self.assertEqual(
+            list(dl.iter_documents("2005-07-20", outpath=self.outpath)),
+            self.parsed(jobs=2),
+        )
+
+    def test_progress(self):
+        calls = []
+        self.extract(progress=lambda *args: calls.append(args))
+        package = self.server.packages["CREC-2005-07-20.zip"]
+        url, received, total = calls[-1]
+        self.assertTrue(url.endswith("CREC-2005-07-22.zip"))
+        self.assertEqual(
+            [received for url, received, total in calls if "07-20" in url][-1],
+            len(package),
+        )
+        self.assertEqual(total, len(package))
+
+    def test_stats(self):
+        collector = stats.enable()
+        try:
+            self.extract(days_in_flight=2)
+        finally:
+            stats.disable()
+        totals = collector.as_dict()
+        self.assertEqual(
+            totals["bytes_downloaded"],
+            sum(
+                len(self.server.packages["CREC-2005-07-{}.zip".format(day)])
+                for day in [20, 21, 22]
+            ),
+        )
+        self.assertEqual(totals["downloads"], {"ok": 3, "404": 2})
+        self.assertEqual(
+            totals["days"], {"extractedFilesdeletedZip": 3, "downloadFailure": 2}
+        )
+        self.assertEqual(totals["stage_calls"], {"download": 5, "extract": 5})
+
+    def test_bad_zip(self):
+        url = dl.GovInfoDL.govinfo_cr_download_base + "2005-07-24.zip"
+        filename = os.path.join(self.outpath, "CREC-2005-07-24.zip")
+        self.assertFalse(dl.downloadRequest(url, filename).status)
+        self.assertEqual(os.listdir(self.outpath), [])
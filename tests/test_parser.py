@@ -1,11 +1,15 @@
 import json
 import logging
 import os
+import pickle
 import random
 import re
+import sys
 import unittest
+from concurrent.futures import ThreadPoolExecutor
 
 from congressionalrecord.govinfo import cr_parser as cr
+from congressionalrecord.govinfo.subclasses import ContentItem
 
 logging.basicConfig(filename="tests.log", level=logging.DEBUG)
 
@@ -29,6 +33,21 @@ class testCRDir(unittest.TestCase):
         crdir = cr.ParseCRDir(input_string)
         self.assertEqual(crdir.cr_dir, input_string)
 
+    def test_granule_index(self):
+        """
+        CRDir indexes granule metadata by accessid
+        """
+        crdir = cr.ParseCRDir("tests/test_files/CREC-2005-07-20")
+        access_id = "CREC-2005-07-20-pt1-PgS8503-2"
+        self.assertIn(access_id, crdir.granules)
+        doc_ref = crdir.granule_ref(access_id)
+        self.assertEqual(
+            doc_ref.searchtitle.string,
+            crdir.mods.find("accessid", string=access_id).parent.searchtitle.string,
+        )
+        self.assertEqual(doc_ref.granuleclass.string, "SENATE")
+        self.assertIsNone(crdir.granule_ref("CREC-2005-07-20-pt1-PgX1"))
+
 
 class testCRFile(unittest.TestCase):
     def setUp(self):
@@ -51,6 +70,160 @@ class testCRFile(unittest.TestCase):
         self.assertGreater(len(crfile.crdoc["content"]), 0, msg="No items in content!")
 
 
+class testExtractPre(unittest.TestCase):
+    def test_matches_soup(self):
+        """
+        The <pre> fast path agrees with BeautifulSoup wherever it answers
+        """
+        from bs4 import BeautifulSoup
+
+        input_dir = "tests/test_files/CREC-2005-07-20/html"
+        answered = 0
+        for apath in os.listdir(input_dir):
+            with open(os.path.join(input_dir, apath), "r") as htm_file:
+                htm_text = htm_file.read()
+            pre_text = cr.extract_pre(htm_text)
+            if pre_text is not None:
+                answered += 1
+                soup_text = BeautifulSoup(htm_text, "lxml").pre.text
+                self.assertEqual(pre_text, soup_text, msg=apath)
+        self.assertGreater(answered, 0)
+
+    def test_falls_back(self):
+        self.assertEqual(
+            cr.extract_pre("<pre>A &amp; B <bullet> C</pre>"), "A & B  C"
+        )
+        self.assertIsNone(cr.extract_pre("<pre>AT&T &nbsp;</pre>"))
+        self.assertIsNone(cr.extract_pre("<pre>a < b</pre>"))
+        self.assertIsNone(cr.extract_pre("<PRE>a</PRE>"))
+        self.assertIsNone(cr.extract_pre("<pre>a</pre><pre>b</pre>"))
+
+
+class testSpeakerAlternation(unittest.TestCase):
+    def test_matches_flat_alternation(self):
+        """
+        The speaker trie matches what joining the names with | did
+        """
+        names = (
+            "Mr. SMITH",
+            "Mr. SMITH of Texas",
+            "Ms. LINDA T. SANCHEZ of California",
+            "Mr. SMITH of New Jersey",
+            "Barrett (SC)",
+            "Mrs. JONES of Ohio",
+        )
+        lines = [
+            "  Mr. SMITH of Texas. Mr. Speaker",
+            "  Mr. SMITH. I yield",
+            "  Mr. SMITH of New Jersey, and others",
+            "  Ms. LINDA T. SANCHEZ of California. Madam",
+            "  Barrett SC. no",
+            "  Mrs. JONES of Ohio, Mr. SMITH",
+            "  MrX SMITH. wildcard, as before",
+            "  Mr. SMYTHE. not a speaker",
+        ]
+        flat = re.compile(r"^\s{1,2}(?P<name>" + "|".join(names) + r")(?:\.|(, ))")
+        trie = re.compile(
+            r"^\s{1,2}(?P<name>" + cr.speaker_alternation(names) + r")(?:\.|(, ))"
+        )
+        for line in lines:
+            flat_match, trie_match = flat.match(line), trie.match(line)
+            self.assertEqual(bool(flat_match), bool(trie_match), msg=line)
+            if flat_match:
+                self.assertEqual(flat_match.group("name"), trie_match.group("name"))
+
+    def test_cached(self):
+        names = ("Mr. REID", "Mr. FRIST")
+        self.assertIs(cr.speaker_alternation(names), cr.speaker_alternation(names))
+        self.assertEqual(cr.speaker_alternation(()), "")
+
+
+class testThreadedParse(unittest.TestCase):
+    """
+    Granules parsed side by side on threads must come out the way they
+    do one at a time, and must leave the class-level item_types alone.
+    """
+
+    def test_threads_match_serial(self):
+        crdir = cr.ParseCRDir("tests/test_files/CREC-2005-07-20")
+        input_paths = [
+            os.path.join(crdir.html_path, name)
+            for name in sorted(os.listdir(crdir.html_path))
+            if "-Pgnull" not in name
+        ]
+        serial = [cr.ParseCRFile(path, crdir).crdoc for path in input_paths]
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            threaded = list(
+                pool.map(lambda path: cr.ParseCRFile(path, crdir).crdoc, input_paths)
+            )
+        self.assertEqual(threaded, serial)
+        self.assertEqual(
+            cr.ParseCRFile.item_types["speech"]["patterns"], ["Mr. BOEHNER"]
+        )
+
+    def test_own_rule_set(self):
+        crdir = cr.ParseCRDir("tests/test_files/CREC-2005-07-20")
+        crfile = cr.ParseCRFile(
+            "tests/test_files/CREC-2005-07-20/html/CREC-2005-07-20-pt1-PgS8503-2.htm",
+            crdir,
+        )
+        self.assertEqual(
+            crfile.item_types["speech"]["patterns"], [crfile.re_newspeaker]
+        )
+        with self.assertRaises(TypeError):
+            crfile.item_types["speech"] = {}
+
+
+class testContentItem(unittest.TestCase):
+    def setUp(self):
+        crdir = cr.ParseCRDir("tests/test_files/CREC-2005-07-20")
+        self.crfile = cr.ParseCRFile(
+            "tests/test_files/CREC-2005-07-20/html/CREC-2005-07-20-pt1-PgS8503-2.htm",
+            crdir,
+        )
+
+    def test_reads_like_a_dict(self):
+        for item in self.crfile.crdoc["content"]:
+            as_dict = item.to_dict()
+            self.assertEqual(list(as_dict)[:4], ["kind", "speaker", "text", "turn"])
+            self.assertEqual(list(as_dict)[-1], "itemno")
+            self.assertEqual(item, as_dict)
+            self.assertEqual(
+                item.get("speaker_bioguide"), as_dict.get("speaker_bioguide")
+            )
+            self.assertIsNone(item.get("no_such_field"))
+
+    def test_extra_fields(self):
+        item = ContentItem(kind="prayer")
+        item["prayer_name"] = "Dr. Barry C. Black"
+        item["itemno"] = 0
+        self.assertEqual(
+            list(item), ["kind", "speaker", "text", "turn", "prayer_name", "itemno"]
+        )
+        self.assertNotIn("speaker_bioguide", item)
+        self.assertEqual(pickle.loads(pickle.dumps(item)), item)
+
+    def test_spans(self):
+        crfile = cr.ParseCRFile(self.crfile.filepath, self.crfile.cr_dir, spans=True)
+        content = crfile.crdoc["content"]
+        self.assertEqual(len(content), len(self.crfile.crdoc["content"]))
+        for item, copied in zip(content, self.crfile.crdoc["content"]):
+            self.assertIsNone(item.text)
+            self.assertIs(item.source, crfile.pre_text)
+            self.assertEqual(item["text"], copied["text"])
+            self.assertEqual(
+                list(item)[:5], ["kind", "speaker", "text", "turn", "spans"]
+            )
+            as_dict = item.to_dict()
+            del as_dict["spans"]
+            self.assertEqual(as_dict, copied)
+
+    def test_interned(self):
+        speakers = [item["speaker"] for item in self.crfile.crdoc["content"]]
+        for speaker in speakers:
+            self.assertIs(speaker, sys.intern(speaker))
+
+
 class testLineBreak(unittest.TestCase):
     def setUp(self):
         self.sp = re.compile(
@@ -0,0 +1,55 @@
+import logging
+import os
+import shutil
+import tempfile
+import unittest
+from collections import OrderedDict
+
+from congressionalrecord.pg_run import pg_cr_bulkwrite as bw
+
+logging.basicConfig(filename="tests.log", level=logging.DEBUG)
+
+
+class testOutStack(unittest.TestCase):
+    def setUp(self):
+        self.outdir = tempfile.mkdtemp()
+        self.outpath = os.path.join(self.outdir, "bills.csv")
+        self.fields = ["congress", "bill_no"]
+
+    def tearDown(self):
+        shutil.rmtree(self.outdir)
+
+    def rows(self, count):
+        return [
+            OrderedDict([("congress", "109"), ("bill_no", str(n))])
+            for n in range(count)
+        ]
+
+    def read(self):
+        with open(self.outpath) as in_file:
+            return in_file.read().splitlines()
+
+    def test_batches_rows(self):
+        stack = bw.crBills(self.outpath, self.fields, max_rows=10)
+        stack.add(self.rows(25))
+        self.assertEqual(stack.rows_written, 20)
+        self.assertEqual(len(stack.stack), 5)
+        stack.close()
+        self.assertTrue(stack.outfile.closed)
+        self.assertEqual(stack.rows_written, 25)
+        self.assertEqual(self.read(), ["109|{}".format(n) for n in range(25)])
+
+    def test_byte_limit(self):
+        with bw.crPages(self.outpath, ["title"], max_bytes=100) as stack:
+            stack.add(OrderedDict([("title", "x" * 60)]))
+            self.assertEqual(stack.rows_written, 0)
+            stack.add(OrderedDict([("title", "y" * 60)]))
+            self.assertEqual(stack.rows_written, 2)
+        self.assertEqual(self.read(), ["x" * 60, "y" * 60])
+
+    def test_appends(self):
+        with bw.crSpeeches(self.outpath, self.fields) as stack:
+            stack.add(self.rows(2))
+        with bw.crSpeeches(self.outpath, self.fields) as stack:
+            stack.add(self.rows(1))
+        self.assertEqual(self.read(), ["109|0", "109|1", "109|0"])
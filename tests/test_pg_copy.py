@@ -0,0 +1,96 @@
+import logging
+import os
+import unittest
+
+from congressionalrecord.govinfo import cr_parser as cr
+from congressionalrecord.pg_run import pg_copy
+
+logging.basicConfig(filename="tests.log", level=logging.DEBUG)
+
+# A libpq connection string for a scratch database, e.g.
+# CR_TEST_PG_DSN="host=127.0.0.1 dbname=scratch user=postgres"
+PG_DSN = os.environ.get("CR_TEST_PG_DSN")
+
+
+class testCopyText(unittest.TestCase):
+    def test_escapes(self):
+        self.assertEqual(
+            pg_copy.copy_text_line(
+                ["a|b\tc\\d\ne\r", None, True, False, 7, "x\x00"]
+            ),
+            "a|b\\tc\\\\d\\ne\\r\t\\N\tt\tf\t7\tx\n",
+        )
+
+    def test_stream(self):
+        rows = [["row {}".format(i), i] for i in range(1000)]
+        stream = pg_copy.CopyStream(rows)
+        chunks = []
+        while True:
+            chunk = stream.read(100)
+            if not chunk:
+                break
+            self.assertLessEqual(len(chunk), 100)
+            chunks.append(chunk)
+        self.assertEqual(
+            b"".join(chunks).decode("utf-8"),
+            "".join(pg_copy.copy_text_line(row) for row in rows),
+        )
+
+
+@unittest.skipUnless(PG_DSN, "set CR_TEST_PG_DSN to run against Postgres")
+class testPGCopySink(unittest.TestCase):
+    def setUp(self):
+        self.connection = pg_copy.pg.connect(PG_DSN)
+        with open("congressionalrecord/pg_config/make_cr_tables.sql") as sql_file:
+            # no leg_bio table here
+            tables_sql = sql_file.read().replace(
+                " REFERENCES leg_bio(bioguideid)", ""
+            )
+        with self.connection.cursor() as cursor:
+            cursor.execute(tables_sql)
+        self.connection.commit()
+        crdir = cr.ParseCRDir("tests/test_files/CREC-2005-07-20")
+        self.crfiles = [
+            cr.ParseCRFile(os.path.join(crdir.html_path, name), crdir)
+            for name in sorted(os.listdir(crdir.html_path))
+            if "-PgS" in name
+        ]
+
+    def tearDown(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute("DROP TABLE cr_speech, cr_bills, cr_pages")
+        self.connection.commit()
+        self.connection.close()
+
+    def load(self):
+        with pg_copy.PGCopySink(self.connection, chunk_size=4096) as sink:
+            for crfile in self.crfiles:
+                sink.write(crfile)
+
+    def count(self, table):
+        with self.connection.cursor() as cursor:
+            cursor.execute("SELECT count(*) FROM {}".format(table))
+            return cursor.fetchone()[0]
+
+    def test_copy(self):
+        self.load()
+        # loading a day again replaces it
+        self.load()
+        loaded = [crfile.crdoc for crfile in self.crfiles if crfile.crdoc["header"]]
+        self.assertEqual(self.count("cr_pages"), len(loaded))
+        self.assertEqual(
+            self.count("cr_bills"),
+            sum(len(crdoc.get("related_bills", [])) for crdoc in loaded),
+        )
+        with self.connection.cursor() as cursor:
+            cursor.execute("SELECT speechid, text FROM cr_speech")
+            texts = dict(cursor.fetchall())
+        self.assertEqual(
+            texts,
+            {
+                crdoc["id"] + "-" + str(item["turn"]): item["text"]
+                for crdoc in loaded
+                for item in crdoc["content"]
+                if item["kind"] == "speech"
+            },
+        )
@@ -0,0 +1,32 @@
+import json
+import logging
+import unittest
+
+from congressionalrecord.govinfo import serialization
+
+logging.basicConfig(filename="tests.log", level=logging.DEBUG)
+
+
+class testJSONBackends(unittest.TestCase):
+    def setUp(self):
+        input_path = (
+            "tests/test_files/CREC-2005-07-20/json/CREC-2005-07-20-pt1-PgS8503-2.json"
+        )
+        with open(input_path) as in_json:
+            self.crdoc = json.load(in_json)
+
+    def test_stdlib(self):
+        backend = serialization.get_backend("json")
+        self.assertEqual(
+            backend.dumps(self.crdoc), json.dumps(self.crdoc).encode("utf-8")
+        )
+
+    @unittest.skipIf(serialization.orjson is None, "no orjson")
+    def test_orjson(self):
+        self.assertEqual(serialization.get_backend().name, "orjson")
+        backend = serialization.get_backend("orjson")
+        self.assertEqual(json.loads(backend.dumps(self.crdoc)), self.crdoc)
+
+    def test_unknown(self):
+        with self.assertRaises(ValueError):
+            serialization.get_backend("yaml")
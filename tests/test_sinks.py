@@ -0,0 +1,290 @@
+import gzip
+import json
+import logging
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from congressionalrecord.govinfo import cr_parser as cr
+from congressionalrecord.govinfo import sinks
+from congressionalrecord.govinfo.downloader import ParsedGranule
+
+logging.basicConfig(filename="tests.log", level=logging.DEBUG)
+
+
+def fixture_granules():
+    input_dir = "tests/test_files/CREC-2005-07-20"
+    crdir = cr.ParseCRDir(input_dir)
+    return [
+        ParsedGranule(crfile.filepath, crfile.crdoc)
+        for crfile in (
+            cr.ParseCRFile(os.path.join(crdir.html_path, name), crdir)
+            for name in [
+                "CREC-2005-07-20-pt1-PgH6109-3.htm",
+                "CREC-2005-07-20-pt1-PgS8503-2.htm",
+                "CREC-2005-07-20-pt1-PgE1540.htm",
+            ]
+        )
+    ]
+
+
+def on_day(granule, day):
+    """A copy of granule as if it were from another day of July 2005."""
+    crdoc = dict(granule.crdoc, id=granule.crdoc["id"].replace("07-20", day))
+    return ParsedGranule(granule.filepath, crdoc)
+
+
+class testNDJSONSink(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.granules = fixture_granules()
+
+    def setUp(self):
+        self.outpath = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.outpath)
+
+    def read_lines(self, path, opener=open):
+        with opener(path, "rt") as in_file:
+            return [json.loads(line) for line in in_file]
+
+    def test_day_files(self):
+        with sinks.NDJSONSink(self.outpath) as sink:
+            for granule in self.granules:
+                sink.write(granule)
+            sink.write(on_day(self.granules[0], "07-21"))
+        self.assertEqual(
+            sorted(os.listdir(os.path.join(self.outpath, "2005"))),
+            ["CREC-2005-07-20.ndjson", "CREC-2005-07-21.ndjson"],
+        )
+        path = os.path.join(self.outpath, "2005", "CREC-2005-07-20.ndjson")
+        self.assertEqual(
+            self.read_lines(path), [granule.crdoc for granule in self.granules]
+        )
+
+    def test_month_gzip(self):
+        with sinks.NDJSONSink(
+            self.outpath, period="month", compression="gzip"
+        ) as sink:
+            sink.write(self.granules[0])
+            sink.write(on_day(self.granules[1], "07-21"))
+        path = os.path.join(self.outpath, "2005", "CREC-2005-07.ndjson.gz")
+        self.assertEqual(os.listdir(os.path.dirname(path)), [os.path.basename(path)])
+        self.assertEqual(
+            [crdoc["id"][:15] for crdoc in self.read_lines(path, gzip.open)],
+            ["CREC-2005-07-20", "CREC-2005-07-21"],
+        )
+
+    @unittest.skipIf(sinks.zstd is None, "no zstd module")
+    def test_zstd(self):
+        with sinks.NDJSONSink(self.outpath, compression="zstd") as sink:
+            sink.write(self.granules[0])
+        path = os.path.join(self.outpath, "2005", "CREC-2005-07-20.ndjson.zst")
+        self.assertEqual(
+            self.read_lines(path, sinks.zstd.open), [self.granules[0].crdoc]
+        )
+
+    def test_failed_run_keeps_part(self):
+        with self.assertRaises(RuntimeError):
+            with sinks.NDJSONSink(self.outpath) as sink:
+                sink.write(self.granules[0])
+                raise RuntimeError()
+        self.assertEqual(
+            os.listdir(os.path.join(self.outpath, "2005")),
+            ["CREC-2005-07-20.ndjson.part"],
+        )
+
+
+@unittest.skipIf(sinks.pa is None, "no pyarrow")
+class testParquetSink(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.granules = fixture_granules()
+
+    def setUp(self):
+        self.outpath = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.outpath)
+
+    def test_tables(self):
+        with sinks.ParquetSink(self.outpath, batch_size=2) as sink:
+            for granule in self.granules:
+                sink.write(granule)
+        items_path = os.path.join(self.outpath, "parquet", "items")
+        self.assertEqual(
+            sorted(os.listdir(os.path.join(items_path, "year=2005"))),
+            ["chamber=House", "chamber=Senate"],
+        )
+        items = sinks.pq.read_table(
+            items_path, filters=[("chamber", "=", "Senate")]
+        ).to_pylist()
+        senate = [
+            granule.crdoc
+            for granule in self.granules
+            if granule.crdoc["header"]["chamber"] == "Senate"
+        ]
+        self.assertEqual(
+            [(item["id"], item["itemno"], item["text"]) for item in items],
+            [
+                (crdoc["id"], item["itemno"], item["text"])
+                for crdoc in senate
+                for item in crdoc["content"]
+            ],
+        )
+        documents = sinks.pq.read_table(
+            os.path.join(self.outpath, "parquet", "documents")
+        )
+        self.assertEqual(documents.num_rows, len(self.granules))
+        bills = sinks.pq.read_table(os.path.join(self.outpath, "parquet", "bills"))
+        self.assertEqual(
+            bills.num_rows,
+            sum(len(g.crdoc.get("related_bills", [])) for g in self.granules),
+        )
+
+
+class stubBulk(BaseHTTPRequestHandler):
+    """Accept _bulk requests, answering the first few with 429."""
+
+    def do_POST(self):
+        server = self.server
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        with server.lock:
+            if server.throttle > 0:
+                server.throttle -= 1
+                self.send_response(429)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            server.requests.append((self.path, body))
+        lines = body.decode("utf-8").splitlines()
+        items = [
+            {"index": {"_id": json.loads(line)["index"]["_id"], "status": 200}}
+            for line in lines[::2]
+        ]
+        reply = json.dumps({"errors": False, "items": items}).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(reply)))
+        self.end_headers()
+        self.wfile.write(reply)
+
+    def log_message(self, *args):
+        pass
+
+
+class testESBulkSink(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.granules = fixture_granules()
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), stubBulk)
+        cls.server.lock = threading.Lock()
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.es_url = "http://127.0.0.1:{}".format(cls.server.server_port)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        self.server.requests = []
+        self.server.throttle = 0
+
+    def index(self, **kwargs):
+        with sinks.ESBulkSink(self.es_url, "cr", **kwargs) as sink:
+            for granule in self.granules:
+                sink.write(granule)
+        return sink
+
+    def indexed_ids(self):
+        ids = []
+        for path, body in self.server.requests:
+            self.assertEqual(path, "/_bulk")
+            lines = body.decode("utf-8").splitlines()
+            ids.extend(
+                (action["index"]["_index"], action["index"]["_id"])
+                for action in map(json.loads, lines[::2])
+            )
+        return sorted(ids)
+
+    def test_bulk(self):
+        sink = self.index(batch_size=2, concurrency=2)
+        self.assertEqual(len(self.server.requests), 2)
+        self.assertEqual(sink.granules_indexed, len(self.granules))
+        ids = self.indexed_ids()
+        expected = [("cr", granule.crdoc["id"]) for granule in self.granules] + [
+            ("cr-items", "{}-{}".format(granule.crdoc["id"], item["itemno"]))
+            for granule in self.granules
+            for item in granule.crdoc["content"]
+        ]
+        self.assertEqual(ids, sorted(expected))
+        # the same granules get the same ids next time
+        self.server.requests = []
+        self.index(batch_size=100)
+        self.assertEqual(len(self.server.requests), 1)
+        self.assertEqual(self.indexed_ids(), ids)
+
+    def test_retry_429(self):
+        self.server.throttle = 2
+        sink = self.index(batch_size=100, backoff=0.01)
+        self.assertEqual(len(self.server.requests), 1)
+        self.assertEqual(sink.granules_indexed, len(self.granules))
+
+    def test_gives_up(self):
+        self.server.throttle = 10
+        with self.assertRaises(RuntimeError):
+            self.index(batch_size=100, retries=1, backoff=0.01)
+
+
+class testSQLiteSink(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.granules = fixture_granules()
+
+    def setUp(self):
+        self.outpath = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.outpath, "cr.sqlite")
+
+    def tearDown(self):
+        shutil.rmtree(self.outpath)
+
+    def load(self, granules):
+        with sinks.SQLiteSink(self.db_path) as sink:
+            for granule in granules:
+                sink.write(granule)
+
+    def test_load_and_search(self):
+        self.load(self.granules + [on_day(self.granules[0], "07-21")])
+        # loading a day again replaces it
+        self.load(self.granules)
+        connection = sqlite3.connect(self.db_path)
+        self.assertEqual(
+            connection.execute("PRAGMA journal_mode").fetchone()[0], "wal"
+        )
+
+        def count(table):
+            sql = "SELECT count(*) FROM {}".format(table)
+            return connection.execute(sql).fetchone()[0]
+
+        self.assertEqual(count("documents"), len(self.granules) + 1)
+        self.assertEqual(
+            count("items"),
+            sum(len(g.crdoc["content"]) for g in self.granules)
+            + len(self.granules[0].crdoc["content"]),
+        )
+        self.assertEqual(count("items_fts"), count("items"))
+        # the Senate prayer
+        hits = connection.execute(
+            "SELECT items.doc_id, items.kind FROM items_fts"
+            " JOIN items ON items.rowid = items_fts.rowid"
+            " WHERE items_fts MATCH ? ORDER BY rank",
+            ("eternal spirit",),
+        ).fetchall()
+        self.assertIn(("CREC-2005-07-20-pt1-PgS8503-2", "prayer"), hits)
+        connection.close()
@@ -0,0 +1,62 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from congressionalrecord.govinfo import cr_parser as cr
+from congressionalrecord.govinfo import stats
+
+
+class testRunStats(unittest.TestCase):
+    def setUp(self):
+        self.crdir = cr.ParseCRDir("tests/test_files/CREC-2005-07-20")
+        self.input_path = (
+            "tests/test_files/CREC-2005-07-20/html/CREC-2005-07-20-pt1-PgS8503-2.htm"
+        )
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        stats.disable()
+        shutil.rmtree(self.tmpdir)
+
+    def test_disabled(self):
+        self.assertIsNone(stats.current())
+        cr.ParseCRFile(self.input_path, self.crdir)
+        self.assertIsNone(stats.current())
+
+    def test_parse(self):
+        collector = stats.enable()
+        crfile = cr.ParseCRFile(self.input_path, self.crdir)
+        totals = collector.as_dict()
+        self.assertEqual(totals["granules_parsed"], 1)
+        self.assertEqual(sum(totals["items"].values()), len(crfile.crdoc["content"]))
+        for stage in ["gen_file_metadata", "read_htm_file", "write_page"]:
+            self.assertEqual(totals["stage_calls"][stage], 1)
+            self.assertGreater(totals["stage_seconds"][stage], 0)
+
+    def test_merge(self):
+        collector = stats.RunStats()
+        collector.count("granules_parsed")
+        collector.count("items", 2, "speech")
+        collector.merge({"granules_parsed": 3, "items": {"speech": 1, "title": 4}})
+        self.assertEqual(
+            collector.as_dict(),
+            {"granules_parsed": 4, "items": {"speech": 3, "title": 4}},
+        )
+
+    def test_dumps(self):
+        collector = stats.RunStats()
+        collector.count("bytes_downloaded", 1024)
+        collector.count("days", label="existingFiles")
+        prom_path = os.path.join(self.tmpdir, "cr.prom")
+        json_path = os.path.join(self.tmpdir, "cr.json")
+        collector.write_prometheus(prom_path)
+        collector.write_json(json_path)
+        with open(prom_path) as prom_file:
+            self.assertIn(
+                "congressionalrecord_bytes_downloaded_total 1024\n", prom_file.read()
+            )
+        with open(json_path) as json_file:
+            self.assertEqual(json.load(json_file), collector.as_dict())
+        self.assertEqual(sorted(os.listdir(self.tmpdir)), ["cr.json", "cr.prom"])